@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+"""Headless benchmarks of the dashboard's compute paths on synthetic data."""
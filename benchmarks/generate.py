@@ -0,0 +1,125 @@
+# benchmarks/generate.py
+"""Writes synthetic Facebook/Google/TikTok/business CSVs at any size.
+
+The files use the same headers as the bundled exports, so the dashboard (and
+``benchmarks.run``) can be pointed at them with ``BI_DATA_DIR``. Rows are
+written a block of days at a time, so even 1e8-row files are generated in
+bounded memory. The output depends only on the arguments and ``--seed``.
+
+    python -m benchmarks.generate --rows 1e7 --out /tmp/bi-bench
+"""
+
+import argparse
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+PLATFORM_TACTICS = {
+    'Facebook': ['ASC', 'Prospecting', 'Retargeting'],
+    'Google': ['Non-Branded Search', 'Display', 'Branded Search'],
+    'TikTok': ['Spark Ads', 'Retargeting', 'Prospecting'],
+}
+STATES = [
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'FL', 'GA', 'HI', 'ID', 'IL', 'IN', 'IA', 'KS', 'KY',
+    'LA', 'ME', 'MD', 'MA', 'MI', 'MN', 'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ', 'NM', 'NY', 'NC', 'ND',
+    'OH', 'OK', 'OR', 'PA', 'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA', 'WV', 'WI', 'WY',
+]
+MARKETING_HEADER = ['date', 'tactic', 'state', 'campaign', 'impression', 'clicks', 'spend', 'attributed revenue']
+
+START_DATE = pd.Timestamp('2024-01-01')
+
+# Rows per CSV block written at once.
+BLOCK_ROWS = 1_000_000
+
+
+def marketing_block(rng, platform, dates, rows_per_day, campaigns, states):
+    """Rows for ``dates``, ``rows_per_day`` distinct (campaign, state) combinations per day.
+
+    ``rows_per_day`` must not exceed ``campaigns * states``.
+    """
+    tactics = PLATFORM_TACTICS[platform]
+    slot = np.tile(np.arange(rows_per_day), len(dates))
+    campaign = slot % campaigns
+    state = (slot // campaigns) % states
+    tactic = campaign % len(tactics)
+
+    # Each campaign has its own efficiency, which diminishes with spend.
+    spend = np.round(rng.lognormal(np.log(1200), 0.5, len(slot)), 2)
+    efficiency = 2.0 + (campaign * 7919 % 100) / 50
+    revenue = efficiency * 3000 * -np.expm1(-spend / 3000) * rng.normal(1, 0.1, len(slot))
+    impressions = (spend * rng.uniform(60, 160, len(slot))).astype(np.int64)
+    clicks = (impressions * rng.uniform(0.005, 0.04, len(slot))).astype(np.int64)
+
+    campaign_names = np.array([f'{platform} - {tactics[c % len(tactics)]} - C{c + 1:04d}' for c in range(campaigns)])
+    return pd.DataFrame({
+        'date': np.repeat(dates.strftime('%Y-%m-%d'), rows_per_day),
+        'tactic': np.array(tactics)[tactic],
+        'state': np.array(STATES[:states])[state],
+        'campaign': campaign_names[campaign],
+        'impression': impressions,
+        'clicks': clicks,
+        'spend': spend,
+        'attributed revenue': np.round(np.maximum(revenue, 0), 2),
+    }, columns=MARKETING_HEADER)
+
+
+def business_frame(rng, dates):
+    orders = rng.normal(3000, 600, len(dates)).clip(100).astype(np.int64)
+    new_orders = (orders * rng.uniform(0.35, 0.5, len(dates))).astype(np.int64)
+    revenue = np.round(orders * rng.normal(88, 6, len(dates)), 2)
+    cogs = np.round(revenue * rng.uniform(0.42, 0.5, len(dates)), 2)
+    return pd.DataFrame({
+        'date': dates.strftime('%Y-%m-%d'),
+        '# of orders': orders,
+        '# of new orders': new_orders,
+        'new customers': new_orders + rng.integers(-20, 20, len(dates)),
+        'total revenue': revenue,
+        'gross profit': np.round(revenue - cogs, 2),
+        'COGS': cogs,
+    })
+
+
+def generate(out, rows, days, campaigns, states, seed=0):
+    """Writes about ``rows`` marketing rows, split evenly over the platforms, plus ``business.csv``.
+
+    Each (date, campaign, state) appears at most once, so when a day needs more
+    rows than ``campaigns * states`` the number of campaigns is raised to fit.
+    Returns the number of marketing rows written.
+    """
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(START_DATE, periods=days, freq='D')
+    rows_per_day = max(1, math.ceil(rows / len(PLATFORM_TACTICS) / days))
+    campaigns = max(campaigns, math.ceil(rows_per_day / states))
+    days_per_block = max(1, BLOCK_ROWS // rows_per_day)
+
+    written = 0
+    for platform in PLATFORM_TACTICS:
+        path = out / f'{platform}.csv'
+        for i, first in enumerate(range(0, days, days_per_block)):
+            block = marketing_block(rng, platform, dates[first:first + days_per_block], rows_per_day, campaigns, states)
+            block.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+            written += len(block)
+    business_frame(rng, dates).to_csv(out / 'business.csv', index=False)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=float, default=1e6, help='total marketing rows (default: 1e6)')
+    parser.add_argument('--days', type=int, default=730, help='days of history (default: 730)')
+    parser.add_argument('--campaigns', type=int, default=200, help='campaigns per platform, raised if too few for --rows (default: 200)')
+    parser.add_argument('--states', type=int, default=len(STATES), help=f'states, up to {len(STATES)} (default: all)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True, help='directory to write the CSVs to')
+    args = parser.parse_args(argv)
+
+    written = generate(args.out, int(args.rows), args.days, args.campaigns, min(args.states, len(STATES)), args.seed)
+    print(f"Wrote {written:,} marketing rows over {args.days} days to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
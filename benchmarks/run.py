@@ -0,0 +1,271 @@
+# benchmarks/run.py
+"""Times each compute path of the dashboard, without Streamlit, and reports JSON.
+
+Each stage is what a page does between its widgets: loading and merging the
+sources, date filtering, the tactic/state/campaign breakdowns, the KPI cards,
+the anomaly scan and the budget projection. Stages run ``--repeat`` times.
+The report holds their median wall time, rows/sec and peak RSS: on Linux the
+peak reached during that stage and how far it rose above the RSS the stage
+started from, elsewhere only the process's peak so far.
+Compare it with an earlier report to catch regressions:
+
+    python -m benchmarks.generate --rows 1e6 --out /tmp/bi-bench
+    python -m benchmarks.run --data /tmp/bi-bench --output baseline.json
+    python -m benchmarks.run --data /tmp/bi-bench --baseline baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+
+def reset_peak_rss():
+    """Restarts the kernel's peak RSS count, so :func:`peak_rss_mb` covers only what follows.
+
+    Returns False where that is not supported (anything but Linux).
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _proc_status_mb(field):
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(f'{field}:'):
+                    return int(line.split()[1]) * 1024 / 1e6
+    except OSError:
+        pass
+    return None
+
+
+def rss_mb():
+    """Current RSS, or None where it is unavailable."""
+    return _proc_status_mb('VmRSS')
+
+
+def peak_rss_mb():
+    """Peak RSS since the last :func:`reset_peak_rss`, or of the whole process where it is unsupported.
+
+    None where neither is available (Windows).
+    """
+    peak = _proc_status_mb('VmHWM')
+    if peak is not None:
+        return peak
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024) / 1e6
+
+
+def measure(name, fn, rows, repeat, setup=None):
+    """Runs ``fn`` ``repeat`` times and returns its stage record and last result.
+
+    ``peak_rss_mb`` is the highest RSS reached during any of the runs (see
+    :func:`reset_peak_rss`), including what was resident before the stage;
+    ``rss_growth_mb`` is how far above that starting point it went.
+    """
+    seconds, peaks, growths = [], [], []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        reset_peak_rss()
+        before = rss_mb()
+        started = time.perf_counter()
+        result = fn()
+        seconds.append(time.perf_counter() - started)
+        peaks.append(peak_rss_mb())
+        if before is not None and peaks[-1] is not None:
+            growths.append(peaks[-1] - before)
+    median = statistics.median(seconds)
+    record = {
+        'stage': name,
+        'seconds': round(median, 6),
+        'min_seconds': round(min(seconds), 6),
+        'peak_rss_mb': round(max(peaks), 1) if None not in peaks else None,
+        'rss_growth_mb': round(max(growths), 1) if growths else None,
+    }
+    return set_rows(record, rows), result
+
+
+def set_rows(record, rows):
+    record['rows'] = rows
+    record['rows_per_second'] = round(rows / record['seconds']) if rows and record['seconds'] > 0 else None
+    return record
+
+
+def run_stages(backend_name, repeat):
+    # Imported here so the BI_* settings made in main() take effect.
+    import shutil
+
+    import pandas as pd
+
+    from dashboard import anomaly, config, data, response, simulation
+    from dashboard.backend import PandasBackend
+    from dashboard.index import DateIndex
+    from dashboard.rollup import RollupCube
+    from dashboard.sqlite_backend import SQLiteBackend
+
+    stages = []
+
+    def clear_cache():
+        shutil.rmtree(config.CACHE_DIR, ignore_errors=True)
+
+    # --- LOADING ---
+    cold, _ = measure('load_and_prepare_cold', data.load_and_prepare_data, None, repeat, setup=clear_cache)
+    warm, (df_daily, df_marketing) = measure('load_and_prepare_warm', data.load_and_prepare_data, None, repeat)
+    rows = len(df_marketing)
+    stages += [set_rows(cold, rows), set_rows(warm, rows)]
+
+    def build_dataset():
+        daily_index = DateIndex(df_daily)
+        marketing_index = DateIndex(df_marketing, partition='platform')
+        return data.Dataset(
+            daily=daily_index.frame,
+            marketing=marketing_index.frame,
+            rollup=RollupCube(df_marketing, df_daily),
+            daily_index=daily_index,
+            marketing_index=marketing_index,
+        )
+
+    record, dataset = measure('build_indexes_and_rollup', build_dataset, rows, repeat)
+    stages.append(record)
+
+    if backend_name == 'sqlite':
+        fingerprint = data.sources_fingerprint()
+        record, backend = measure(
+            'build_sqlite_store',
+            lambda: SQLiteBackend(config.SQLITE_PATH, fingerprint),
+            rows,
+            repeat,
+            setup=lambda: config.SQLITE_PATH.unlink(missing_ok=True),
+        )
+        stages.append(record)
+    else:
+        backend = PandasBackend(dataset)
+
+    # --- PAGE QUERIES ---
+    first, last = backend.marketing_date_range()
+    start = first + (last - first) / 4
+    end = last - (last - first) / 4
+    span = end - start
+    platform_name = backend.platforms()[0]
+
+    def date_filter():
+        return backend.daily(start, end), backend.marketing_rows(start, end), backend.marketing_rows(start, end, platform_name)
+
+    page_queries = [
+        ('date_filter', date_filter),
+        ('breakdown_platform', lambda: backend.breakdown(start, end, 'platform')),
+        ('breakdown_tactic', lambda: backend.breakdown(start, end, 'tactic', platform_name)),
+        ('breakdown_state', lambda: backend.breakdown(start, end, 'state', platform_name)),
+        ('breakdown_campaign', lambda: backend.breakdown(start, end, ['platform', 'campaign'])),
+        ('channel_trend_and_map', lambda: (
+            backend.daily_trend(start, end, platform_name), backend.state_map(start, end, platform_name)
+        )),
+        ('kpis', lambda: (backend.kpis(start, end), backend.kpis(start - span, start - pd.Timedelta(days=1)))),
+    ]
+    # Rows in range, i.e. what the queries would scan without the indexes and rollup.
+    rows_in_range = len(backend.marketing_rows(start, end))
+    for name, fn in page_queries:
+        record, _ = measure(name, fn, rows_in_range, repeat)
+        stages.append(record)
+
+    # --- ANOMALY SCAN ---
+    # A fresh monitor each run, i.e. the first page render after a restart.
+    record, _ = measure('anomaly_scan', lambda: anomaly.AnomalyMonitor().flags(backend, 'benchmark'), None, repeat)
+    stages.append(record)
+
+    # --- BUDGET PROJECTION ---
+    def budget_projection():
+        history = backend.daily_breakdown(first, last, 'platform')
+        curves = response.fit_curves(history, 'platform')
+        allocation = response.optimize(curves, 50_000, 30)
+        ratios = simulation.daily_ratios(history, curves, 'platform')
+        return simulation.revenue_bands(curves, ratios, allocation, 30)
+
+    record, _ = measure('budget_projection', budget_projection, rows, repeat)
+    stages.append(record)
+    return stages
+
+
+def compare(stages, baseline, tolerance):
+    """Stages more than ``tolerance`` (a fraction) slower than in ``baseline``."""
+    previous = {stage['stage']: stage['seconds'] for stage in baseline['stages']}
+    return [
+        {'stage': stage['stage'], 'seconds': stage['seconds'], 'baseline_seconds': previous[stage['stage']]}
+        for stage in stages
+        if stage['stage'] in previous and stage['seconds'] > previous[stage['stage']] * (1 + tolerance)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--data', required=True, help='directory with the source CSVs (see benchmarks.generate)')
+    parser.add_argument('--backend', choices=['pandas', 'sqlite'], default='pandas')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per stage; the median is reported (default: 3)')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--baseline', help='earlier JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='slowdown vs. the baseline counted as a regression (default: 0.25)')
+    args = parser.parse_args(argv)
+
+    os.environ['BI_DATA_DIR'] = args.data
+    os.environ['BI_BACKEND'] = args.backend
+    with tempfile.TemporaryDirectory(prefix='bi-bench-') as cache_dir:
+        os.environ['BI_CACHE_DIR'] = cache_dir
+        stages = run_stages(args.backend, args.repeat)
+
+    import numpy as np
+    import pandas as pd
+
+    report = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'backend': args.backend,
+        'repeat': args.repeat,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'cpus': os.cpu_count(),
+        # 'stage': each stage's own peak; 'process': the process's peak so far, where stages cannot be separated.
+        'peak_rss_scope': 'stage' if reset_peak_rss() else 'process',
+        'stages': stages,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('backend') != args.backend:
+            parser.error(f"--baseline was measured on the {baseline.get('backend')} backend, not {args.backend}")
+        regressions = compare(stages, baseline, args.tolerance)
+        report['regressions'] = regressions
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression['stage']}: {regression['seconds']:.4f}s "
+            f"vs. {regression['baseline_seconds']:.4f}s",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
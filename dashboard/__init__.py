@@ -0,0 +1,2 @@
+# dashboard/__init__.py
+"""Shared, Streamlit-independent building blocks for the dashboard pages."""
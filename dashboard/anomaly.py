@@ -0,0 +1,222 @@
+# dashboard/anomaly.py
+"""Rolling anomaly flags over every daily series at once.
+
+A series is one combination of dimension values, e.g. a campaign in a state.
+Each measure is held as a (series x day) matrix, so every series is scored in
+the same array operations rather than group by group. A day is compared with
+the ``WINDOW`` days before it through the rolling mean and standard deviation
+and the robust z-score ``(value - median) / (1.4826 * MAD)``, which a few
+outliers in the window cannot mask. :class:`AnomalyDetector` keeps only the
+days it still needs, so when new days arrive just those days are scored.
+"""
+
+import threading
+from dataclasses import dataclass
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Days of history each day is compared with.
+WINDOW = 28
+# The latest days that are scored and flagged.
+RECENT_DAYS = 7
+# Robust z-score, in the metric's bad direction, from which a day is flagged.
+THRESHOLD = 3.5
+# Days in the window with a defined value needed before a day can be flagged.
+MIN_HISTORY = 14
+
+# Scales the MAD of normally distributed data to its standard deviation.
+MAD_SCALE = 1.4826
+
+# name -> (numerator, denominator, label, flagged direction: -1 for drops, 1 for spikes)
+METRICS = {
+    'roas': ('attributed_revenue', 'spend', 'ROAS drop', -1),
+    'ctr': ('clicks', 'impressions', 'CTR collapse', -1),
+    'cac': ('spend', 'new_customers', 'CAC spike', 1),
+}
+
+SERIES = ['platform', 'campaign', 'state']
+
+FLAG_COLUMNS = ['label', 'date', 'metric', 'value', 'mean', 'std', 'median', 'z']
+
+
+@dataclass
+class DailyPanel:
+    """Daily sums of some measures, one row per series and one column per day."""
+    index: pd.Index
+    dates: pd.DatetimeIndex
+    sums: dict
+
+    @classmethod
+    def from_frame(cls, df, by, measures):
+        """Pivots daily rows (``date``, ``by`` columns, ``measures``) into a panel.
+
+        With ``by`` empty the rows are summed into a single series.
+        """
+        dates = pd.date_range(df['date'].min(), df['date'].max(), freq='D')
+        if by:
+            groups = df.groupby(list(by), observed=True, sort=False)
+            codes, index = groups.ngroup().to_numpy(), groups.size().index
+        else:
+            codes, index = np.zeros(len(df), dtype=np.intp), pd.Index(['All channels'], name='series')
+        cell = codes * len(dates) + dates.get_indexer(df['date'])
+        shape = (len(index), len(dates))
+        sums = {
+            measure: np.bincount(cell, weights=df[measure].to_numpy(dtype=float), minlength=shape[0] * shape[1]).reshape(shape)
+            for measure in measures
+        }
+        return cls(index, dates, sums)
+
+    def combine(self, other, keep_days):
+        """This panel with ``other``'s days added or replaced, trimmed to the last ``keep_days`` days."""
+        dates = pd.date_range(min(self.dates[0], other.dates[0]), max(self.dates[-1], other.dates[-1]), freq='D')[-keep_days:]
+        index = self.index.append(other.index).unique()
+        sums = {}
+        for measure in self.sums:
+            combined = np.zeros((len(index), len(dates)))
+            for panel in (self, other):
+                cols = dates.get_indexer(panel.dates)
+                kept = cols >= 0
+                # Every series' sums on a replaced day come from the new panel, even if absent from it.
+                combined[:, cols[kept]] = 0
+                combined[np.ix_(index.get_indexer(panel.index), cols[kept])] = panel.sums[measure][:, kept]
+            sums[measure] = combined
+        return DailyPanel(index, dates, sums)
+
+
+def _nan_median(a):
+    """Median along the last axis, ignoring NaN; NaN where every value is."""
+    a = np.sort(a, axis=-1)  # NaN sorts last
+    n = np.count_nonzero(~np.isnan(a), axis=-1)
+    lo = np.take_along_axis(a, np.maximum((n - 1) // 2, 0)[..., None], axis=-1)[..., 0]
+    hi = np.take_along_axis(a, np.minimum(n // 2, a.shape[-1] - 1)[..., None], axis=-1)[..., 0]
+    return (lo + hi) / 2
+
+
+def rolling_scores(values, days, window=WINDOW):
+    """Scores the last ``days`` columns of ``values`` (series x day) against the ``window`` days before each.
+
+    Returns the rolling mean, standard deviation, median, robust z-score and
+    count of defined values, each of shape (series, days). NaN values are missing.
+    """
+    padded = np.concatenate([np.full((len(values), window), np.nan), values], axis=1)
+    windows = sliding_window_view(padded, window + 1, axis=1)[:, -days:]
+    baseline, current = windows[..., :-1], windows[..., -1]
+
+    defined = ~np.isnan(baseline)
+    count = defined.sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(defined, baseline, 0).sum(axis=-1) / count
+        std = np.sqrt(np.where(defined, (baseline - mean[..., None]) ** 2, 0).sum(axis=-1) / count)
+        median = _nan_median(baseline)
+        scale = MAD_SCALE * _nan_median(np.abs(baseline - median[..., None]))
+        # A window that is mostly one value has no MAD; its spread falls back to the standard deviation.
+        scale = np.where(scale > 0, scale, std)
+        z = np.where(scale > 0, (current - median) / scale, np.nan)
+    return {'value': current, 'mean': mean, 'std': std, 'median': median, 'z': z, 'count': count}
+
+
+def score(panel, metrics, days, window=WINDOW):
+    """Flags among the last ``days`` days of ``panel``, most anomalous first."""
+    days = min(days, len(panel.dates))
+    frames = []
+    for metric in metrics:
+        numerator, denominator, _, direction = METRICS[metric]
+        den = panel.sums[denominator]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = np.where(den > 0, panel.sums[numerator] / den, np.nan)
+        scores = rolling_scores(values, days, window)
+        flagged = (scores['count'] >= MIN_HISTORY) & (direction * scores['z'] >= THRESHOLD)
+        rows, cols = np.nonzero(flagged)
+        frame = pd.DataFrame({name: scores[name][rows, cols] for name in ['value', 'mean', 'std', 'median', 'z']})
+        frame.insert(0, 'metric', metric)
+        frame.insert(0, 'date', panel.dates[-days:][cols])
+        keys = panel.index[rows]
+        frame.insert(0, 'label', [' / '.join(map(str, key)) if isinstance(key, tuple) else str(key) for key in keys])
+        frames.append(pd.concat([keys.to_frame(index=False), frame], axis=1))
+    return most_severe_first(pd.concat(frames, ignore_index=True))
+
+
+def most_severe_first(flags):
+    return flags.iloc[np.argsort(-flags['z'].abs().to_numpy(dtype=float), kind='stable')].reset_index(drop=True)
+
+
+def concat_flags(frames):
+    """Concatenates flag frames, most anomalous first, without letting empty ones change the dtypes."""
+    non_empty = [frame for frame in frames if len(frame)]
+    return most_severe_first(pd.concat(non_empty, ignore_index=True)) if non_empty else frames[0]
+
+
+class AnomalyDetector:
+    """Flags of the latest ``recent_days`` days of every ``by`` series, kept up to date as days arrive."""
+
+    def __init__(self, by, metrics, window=WINDOW, recent_days=RECENT_DAYS):
+        self.by = list(by)
+        self.metrics = list(metrics)
+        self.measures = sorted({col for metric in self.metrics for col in METRICS[metric][:2]})
+        self.window = window
+        self.recent_days = recent_days
+        self.panel = None
+        self.flags = pd.DataFrame(columns=[*(self.by or ['series']), *FLAG_COLUMNS])
+
+    @property
+    def last_date(self):
+        return None if self.panel is None else self.panel.dates[-1]
+
+    def update(self, df):
+        """Folds in the daily rows of ``df`` and scores the days they cover.
+
+        Each day in ``df`` must be complete: it replaces that day's sums.
+        """
+        if df.empty:
+            return self.flags
+        new = DailyPanel.from_frame(df, self.by, self.measures)
+        keep_days = self.window + self.recent_days
+        self.panel = new if self.panel is None else self.panel.combine(new, keep_days)
+        recent = self.panel.dates[-self.recent_days:]
+        rescored = recent[recent >= new.dates[0]]
+        flags = self.flags[self.flags['date'].isin(recent.difference(rescored))]
+        if len(rescored):
+            flags = concat_flags([flags, score(self.panel, self.metrics, len(rescored), self.window)])
+        self.flags = flags
+        return self.flags
+
+
+class AnomalyMonitor:
+    """Keeps anomaly flags in step with a backend: ROAS and CTR per campaign and state, CAC overall.
+
+    Each time the data changes only the days from the last one seen onwards
+    are queried and scored; the last day is queried again in case it was
+    incomplete. A backend whose data now ends earlier is rescored from scratch.
+    """
+
+    def __init__(self, window=WINDOW, recent_days=RECENT_DAYS):
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._detectors = [
+            (AnomalyDetector(SERIES, ['roas', 'ctr'], window, recent_days),
+             lambda backend, start, end: backend.daily_breakdown(start, end, SERIES)),
+            (AnomalyDetector([], ['cac'], window, recent_days),
+             lambda backend, start, end: backend.daily(start, end)),
+        ]
+
+    def flags(self, backend, fingerprint):
+        """Flags of the latest days in ``backend``'s data, most anomalous first."""
+        with self._lock:
+            if fingerprint != self._fingerprint:
+                self._sync(backend)
+                self._fingerprint = fingerprint
+            return concat_flags([detector.flags for detector, _ in self._detectors])
+
+    def _sync(self, backend):
+        _, last = backend.marketing_date_range()
+        for i, (detector, query) in enumerate(self._detectors):
+            if detector.last_date is None or last < detector.last_date:
+                detector = AnomalyDetector(detector.by, detector.metrics, detector.window, detector.recent_days)
+                self._detectors[i] = (detector, query)
+                start = last - timedelta(days=detector.window + detector.recent_days - 1)
+            else:
+                start = detector.last_date
+            detector.update(query(backend, start, last))
@@ -0,0 +1,65 @@
+# dashboard/backend.py
+"""The queries the pages run, answered from the in-memory dataset.
+
+Pages talk to a backend rather than to frames directly so the same page code
+can run on :class:`PandasBackend` or on
+:class:`~dashboard.sqlite_backend.SQLiteBackend`. Both return frames of the
+same shape from the same methods.
+"""
+
+from dashboard.schema import MARKETING_MEASURES
+
+
+class PandasBackend:
+    """Serves page queries from a shared :class:`~dashboard.data.Dataset`."""
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+
+    @property
+    def empty(self):
+        return self.dataset.empty
+
+    def daily_date_range(self):
+        """First and last date of the daily performance data."""
+        return self.dataset.daily['date'].min(), self.dataset.daily['date'].max()
+
+    def marketing_date_range(self):
+        """First and last date of the marketing data."""
+        return self.dataset.marketing['date'].min(), self.dataset.marketing['date'].max()
+
+    def platforms(self):
+        return self.dataset.marketing_index.partitions
+
+    def daily(self, start, end):
+        """Daily business and marketing performance rows within ``[start, end]``."""
+        return self.dataset.daily_between(start, end)
+
+    def marketing_rows(self, start, end, platform=None):
+        """Campaign-level rows within ``[start, end]``, for one platform or all of them."""
+        return self.dataset.marketing_between(start, end, platform)
+
+    def kpis(self, start, end, platform=None):
+        """Summed measures and derived ratios over ``[start, end]``."""
+        return self.dataset.rollup.kpis(start, end, platform)
+
+    def breakdown(self, start, end, by, platform=None):
+        """Summed measures per value of the dimension(s) ``by``."""
+        return self.dataset.rollup.breakdown(start, end, by, platform)
+
+    def daily_breakdown(self, start, end, by):
+        """Daily spend, impressions, clicks and attributed revenue per value of the dimension(s) ``by``."""
+        by = [by] if isinstance(by, str) else list(by)
+        df = self.marketing_rows(start, end)
+        return df.groupby(['date', *by], observed=True)[MARKETING_MEASURES].sum().reset_index()
+
+    def daily_trend(self, start, end, platform):
+        """Daily spend and attributed revenue of one platform."""
+        df = self.marketing_rows(start, end, platform)
+        return df.groupby('date').agg({'spend': 'sum', 'attributed_revenue': 'sum'}).reset_index()
+
+    def state_map(self, start, end, platform):
+        """Spend and average row-level ROAS per state for one platform."""
+        df = self.marketing_rows(start, end, platform)
+        return df.groupby('state', observed=True).agg(spend=('spend', 'sum'), roas=('roas', 'mean')).reset_index()
+
@@ -0,0 +1,153 @@
+# dashboard/batch.py
+"""Runs a batch of reports from the command line, across a process pool.
+
+Each line of the spec file (CSV, or a JSON list of objects) names one report:
+
+    name,kind,start,end,platform,campaign
+    overview-q1,overview,2025-01-01,2025-03-31,,
+    facebook-q1,channel,2025-01-01,2025-03-31,Facebook,
+    google-campaigns,campaigns,2025-01-01,2025-03-31,Google,
+
+``kind`` is one of :data:`dashboard.reports.REPORT_KINDS`; ``platform`` and
+``campaign`` are optional filters. The dataset (or SQLite store) is loaded once,
+before the workers start. Where processes are forked the workers share it
+copy-on-write; elsewhere each worker loads it once. Every report is written to
+``<out>/<name>.<ext>`` by the worker that computed it, and ``index.csv`` lists
+each report with its row count, timing and insight:
+
+    python -m dashboard.batch specs.csv --out reports/ --format parquet
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from dashboard import config, data, export, reports
+from dashboard.backend import PandasBackend
+from dashboard.sqlite_backend import SQLiteBackend
+
+logger = logging.getLogger(__name__)
+
+SPEC_COLUMNS = ['name', 'kind', 'start', 'end', 'platform', 'campaign']
+
+# Set in the parent before the pool starts, so forked workers inherit it.
+_backend = None
+
+
+def open_backend():
+    """The query backend chosen by ``BI_BACKEND``, without Streamlit's caches."""
+    if config.BACKEND == 'pandas':
+        return PandasBackend(data.load_dataset())
+    return SQLiteBackend(config.SQLITE_PATH, data.sources_fingerprint())
+
+
+def read_specs(path):
+    """Reads :class:`~dashboard.reports.ReportSpec` objects from a CSV or JSON file."""
+    path = Path(path)
+    if path.suffix == '.json':
+        with open(path) as f:
+            rows = pd.DataFrame(json.load(f))
+    else:
+        rows = pd.read_csv(path, dtype=str, keep_default_na=False)
+    missing = {'kind', 'start', 'end'} - set(rows.columns)
+    if missing:
+        raise ValueError(f"Spec file {path} is missing the column(s) {sorted(missing)}")
+    rows = rows.reindex(columns=SPEC_COLUMNS)
+
+    def field(value):
+        return None if pd.isna(value) or value == '' else str(value)
+
+    specs = []
+    for i, row in enumerate(rows.to_dict('records')):
+        row = {col: field(value) for col, value in row.items()}
+        specs.append(reports.ReportSpec(
+            name=row['name'] or f"{i:04d}-{row['kind']}",
+            kind=row['kind'],
+            start=pd.Timestamp(row['start']),
+            end=pd.Timestamp(row['end']),
+            platform=row['platform'],
+            campaign=row['campaign'],
+        ))
+    names = [spec.name for spec in specs]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Report names in {path} must be unique")
+    return specs
+
+
+def _init_worker():
+    global _backend
+    if _backend is None:
+        _backend = open_backend()
+
+
+def _run(spec, out, fmt):
+    started = time.perf_counter()
+    report = reports.run_report(_backend, spec)
+    file_name = export.file_name(spec.name, fmt)
+    with open(out / file_name, 'wb') as f:
+        f.write(export.to_bytes(report.frame, fmt))
+    return {
+        'name': spec.name,
+        'kind': spec.kind,
+        'file': file_name,
+        'rows': len(report.frame),
+        'seconds': round(time.perf_counter() - started, 4),
+        'insight': report.insight,
+    }
+
+
+def run_batch(specs, out, fmt='csv', workers=None):
+    """Writes every report in ``specs`` to ``out`` and returns their index as a frame."""
+    global _backend
+    out = Path(out)
+    out.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    _backend = open_backend()
+
+    if workers == 1:
+        rows = [_run(spec, out, fmt) for spec in specs]
+    else:
+        context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else None)
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker) as pool:
+            # A few chunks per worker keeps them all busy without one task per report.
+            chunksize = max(1, len(specs) // (workers * 4))
+            rows = list(pool.map(_run, specs, [out] * len(specs), [fmt] * len(specs), chunksize=chunksize))
+
+    index = pd.DataFrame(rows, columns=['name', 'kind', 'file', 'rows', 'seconds', 'insight'])
+    index.to_csv(out / 'index.csv', index=False)
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('specs', help='CSV or JSON file of report specs')
+    parser.add_argument('--out', required=True, help='directory to write the reports to')
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='worker processes (default: one per CPU core)')
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(name)s: %(message)s')
+    try:
+        specs = read_specs(args.specs)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    started = time.perf_counter()
+    index = run_batch(specs, args.out, args.format, args.workers)
+    logger.info("Wrote %d reports to %s in %.2fs", len(index), args.out, time.perf_counter() - started)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+# dashboard/cache.py
+"""Streamlit caches shared by every page.
+
+The cached objects live here, rather than in each page script, so that all
+pages and sessions share one prepared dataset instead of holding their own copy.
+"""
+
+import streamlit as st
+
+from dashboard import anomaly, config, data, downsample, export, perf, response, simulation
+from dashboard.backend import PandasBackend
+from dashboard.sqlite_backend import SQLiteBackend
+
+
+def _counted(cache, **options):
+    """Applies the Streamlit ``cache`` decorator, counting its lookups and misses for :mod:`dashboard.perf`."""
+    def decorate(fn):
+        name = fn.__name__.lstrip('_')
+        return perf.count_calls(name)(cache(**options)(perf.count_misses(name)(fn)))
+    return decorate
+
+
+@_counted(st.cache_resource)
+def _dataset_loader():
+    return data.DatasetLoader()
+
+
+@_counted(st.cache_resource, max_entries=1, show_spinner="Building the SQLite store...")
+def _sqlite_backend(fingerprint):
+    return SQLiteBackend(config.SQLITE_PATH, fingerprint)
+
+
+def load_dataset():
+    """Returns the shared :class:`~dashboard.data.Dataset`, refreshed when a source CSV changes.
+
+    The dataset is not copied per rerun: treat its frames as read-only.
+    """
+    try:
+        return _dataset_loader().load()
+    except Exception as e:
+        st.error(f"Error loading data. Please ensure all CSV files are present and correctly formatted. Error: {e}")
+        return data.EMPTY_DATASET
+
+
+def load_backend():
+    """Returns the query backend chosen by ``BI_BACKEND``."""
+    if config.BACKEND == 'pandas':
+        return PandasBackend(load_dataset())
+    try:
+        return _sqlite_backend(data.sources_fingerprint())
+    except Exception as e:
+        st.error(f"Error loading data. Please ensure all CSV files are present and correctly formatted. Error: {e}")
+        return PandasBackend(data.EMPTY_DATASET)
+
+
+@_counted(st.cache_data, max_entries=8, show_spinner=False)
+def _daily_history(fingerprint, by):
+    backend = load_backend()
+    first_date, last_date = backend.marketing_date_range()
+    return backend.daily_breakdown(first_date, last_date, response.channel_columns(by))
+
+
+@_counted(st.cache_data, max_entries=8, show_spinner="Fitting response curves...")
+def _response_curves(fingerprint, by):
+    return response.fit_curves(_daily_history(fingerprint, by), by)
+
+
+@_counted(st.cache_data, max_entries=8, show_spinner=False)
+def _daily_ratios(fingerprint, by):
+    return simulation.daily_ratios(_daily_history(fingerprint, by), _response_curves(fingerprint, by), by)
+
+
+# Keyed by the allocation itself, so returning a slider to an earlier value
+# is a cache hit rather than a new simulation.
+@_counted(st.cache_data, max_entries=256, show_spinner=False)
+def _revenue_bands(fingerprint, by, allocations, horizon_days):
+    return simulation.revenue_bands(
+        _response_curves(fingerprint, by), _daily_ratios(fingerprint, by), allocations, horizon_days
+    )
+
+
+def response_curves(by='platform'):
+    """Returns the :class:`~dashboard.response.ResponseCurves` per channel at level ``by``, refitted when a source CSV changes.
+
+    Below the platform level a channel is a platform's tactic or campaign,
+    labelled like "TikTok / Prospecting".
+    """
+    return _response_curves(data.sources_fingerprint(), by)
+
+
+def revenue_bands(allocations, horizon_days, by='platform'):
+    """P10/P50/P90 revenue and ROAS of ``allocations`` (aligned with ``response_curves(by).channels``)."""
+    return _revenue_bands(data.sources_fingerprint(), by, tuple(allocations), horizon_days)
+
+
+# Chart series are cached per (data version, range) already thinned to the
+# chart point budget, so a rerun never re-serializes the full-resolution rows.
+@_counted(st.cache_data, max_entries=64, show_spinner=False)
+def _performance_series(fingerprint, start, end):
+    df = load_backend().daily(start, end)
+    return downsample.downsample(df, 'date', ['total_revenue', 'spend', 'gross_profit'])
+
+
+@_counted(st.cache_data, max_entries=64, show_spinner=False)
+def _channel_trend_series(fingerprint, start, end, platform):
+    df = load_backend().daily_trend(start, end, platform)
+    return downsample.downsample(df, 'date', ['spend', 'attributed_revenue'])
+
+
+def performance_series(start, end):
+    """Revenue, spend and profit over ``[start, end]`` for the Homepage chart, and their granularity.
+
+    Long ranges are thinned to ``BI_CHART_POINTS`` (see :mod:`dashboard.downsample`)
+    before they reach the page, so pages can plot the result as it is.
+    """
+    return _performance_series(data.sources_fingerprint(), start, end)
+
+
+def channel_trend_series(start, end, platform):
+    """Spend and attributed revenue of ``platform`` over ``[start, end]``, and their granularity.
+
+    Thinned like :func:`performance_series`.
+    """
+    return _channel_trend_series(data.sources_fingerprint(), start, end, platform)
+
+
+# One monitor for every session: when the sources change it only scores the
+# days it has not seen, rather than every series' whole history.
+@_counted(st.cache_resource)
+def _anomaly_monitor():
+    return anomaly.AnomalyMonitor()
+
+
+def anomaly_flags():
+    """Anomalous days among the latest days of every campaign/state series, most anomalous first."""
+    return _anomaly_monitor().flags(load_backend(), data.sources_fingerprint())
+
+
+# ``_df`` is left out of the cache key: ``key`` names the page and filters that
+# produced it, which identifies the frame far more cheaply than hashing it.
+@_counted(st.cache_data, max_entries=32, show_spinner=False)
+def _export_file(fingerprint, key, fmt, _df):
+    return export.to_bytes(_df, fmt)
+
+
+def export_file(df, key, fmt):
+    """``df`` serialized as ``fmt``, cached per data version and ``key`` (page plus filters).
+
+    Pages hand ``st.download_button`` a ``partial`` of this rather than the
+    bytes, so the file is only serialized when the button is clicked.
+    """
+    with perf.deferred(f'{key[0].title()} export', 'export'):
+        return _export_file(data.sources_fingerprint(), key, fmt, df)
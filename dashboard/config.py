@@ -0,0 +1,44 @@
+# dashboard/config.py
+"""Runtime settings, overridable through ``BI_*`` environment variables."""
+
+import os
+from pathlib import Path
+
+# Directory holding the platform and business CSV exports.
+DATA_DIR = Path(os.environ.get('BI_DATA_DIR', '.'))
+
+# Directory for columnar snapshots and other derived, disposable files.
+CACHE_DIR = Path(os.environ.get('BI_CACHE_DIR', DATA_DIR / '.bi_cache'))
+
+# Threads used to parse the source files concurrently.
+LOAD_WORKERS = int(os.environ.get('BI_LOAD_WORKERS', os.cpu_count() or 4))
+
+# How source CSVs are parsed: 'full' reads each file at once, 'stream' folds it
+# into daily aggregates CHUNK_SIZE rows at a time so peak memory stays bounded.
+INGEST_MODE = os.environ.get('BI_INGEST_MODE', 'full')
+CHUNK_SIZE = int(os.environ.get('BI_CHUNK_SIZE', 1_000_000))
+
+if INGEST_MODE not in ('full', 'stream'):
+    raise ValueError(f"BI_INGEST_MODE must be 'full' or 'stream', not {INGEST_MODE!r}")
+
+# Where the pages' queries run: 'pandas' answers them from the in-memory
+# dataset, 'sqlite' pushes them down to an indexed SQLite file at SQLITE_PATH.
+BACKEND = os.environ.get('BI_BACKEND', 'pandas')
+SQLITE_PATH = Path(os.environ.get('BI_SQLITE_PATH', CACHE_DIR / 'dashboard.sqlite'))
+
+if BACKEND not in ('pandas', 'sqlite'):
+    raise ValueError(f"BI_BACKEND must be 'pandas' or 'sqlite', not {BACKEND!r}")
+
+# Most points a time-series chart sends to the browser. Longer series are
+# thinned with largest-triangle-three-buckets ('lttb', keeps the shape of the
+# daily line) or summed into weekly/monthly buckets ('bucket').
+CHART_POINTS = int(os.environ.get('BI_CHART_POINTS', 500))
+CHART_DOWNSAMPLE = os.environ.get('BI_CHART_DOWNSAMPLE', 'lttb')
+
+if CHART_DOWNSAMPLE not in ('lttb', 'bucket'):
+    raise ValueError(f"BI_CHART_DOWNSAMPLE must be 'lttb' or 'bucket', not {CHART_DOWNSAMPLE!r}")
+
+# Per-section page timings and cache hit counts, shown in a sidebar panel and
+# logged (and appended as JSON lines to PERF_LOG when set). Off by default.
+PERF = os.environ.get('BI_PERF', '').lower() not in ('', '0', 'false', 'no')
+PERF_LOG = os.environ.get('BI_PERF_LOG')
@@ -0,0 +1,308 @@
+# dashboard/data.py
+"""Loading and preparation of the marketing and business data.
+
+Every page reads its data through this module. Each parsed CSV is written to a
+Parquet snapshot in ``config.CACHE_DIR`` and reused until the source file's
+modification time or size changes, so the CSVs are only parsed once.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from dashboard import config, ingest, snapshots
+from dashboard import sources as registry
+from dashboard.index import DateIndex
+from dashboard.rollup import RollupCube
+from dashboard.schema import (
+    BUSINESS_DTYPES, DATE_DTYPE, DIMENSIONS, MARKETING_DTYPES, MARKETING_KEYS, MARKETING_MEASURES,
+    concat_categorical, normalize_columns,
+)
+
+logger = logging.getLogger(__name__)
+
+# Columns build_daily_performance derives from the summed measures.
+DAILY_RATIOS = ['roas', 'cpc', 'ctr', 'cpo', 'cac']
+
+
+# --- PARSING ---
+def compact_marketing(df, platform):
+    """Stores the dimensions as categoricals and downcasts the measures."""
+    df['platform'] = pd.Categorical.from_codes(np.zeros(len(df), dtype='int8'), categories=[platform])
+    return df.astype({**{col: 'category' for col in DIMENSIONS}, **MARKETING_DTYPES})
+
+
+def read_csv(path, source):
+    """Parses a whole export with Arrow's multithreaded CSV reader and normalizes its columns."""
+    df = normalize_columns(pd.read_csv(path, engine='pyarrow'), source.columns)
+    df['date'] = pd.to_datetime(df['date']).astype(DATE_DTYPE)
+    return df
+
+
+def read_marketing_csv(path, source):
+    """Parses one ad-platform export into the shared, compact marketing schema.
+
+    In ``stream`` ingest mode the file is folded chunk by chunk into daily
+    totals per campaign, state and tactic instead of being loaded whole.
+    """
+    if config.INGEST_MODE == 'stream':
+        df, stats = ingest.stream_aggregate(path, source.columns, MARKETING_KEYS, MARKETING_MEASURES, chunksize=config.CHUNK_SIZE)
+        stats.log()
+        return compact_marketing(df, source.name)
+
+    df = read_csv(path, source)
+    before = frame_memory(df)
+    df = compact_marketing(df, source.name)
+    log_memory(f'{source.name} marketing data', before, frame_memory(df))
+    return df
+
+
+def read_business_csv(path, source):
+    """Parses the daily business export, streaming it in ``stream`` ingest mode."""
+    if config.INGEST_MODE == 'stream':
+        df, stats = ingest.stream_aggregate(path, source.columns, ['date'], chunksize=config.CHUNK_SIZE)
+        stats.log()
+    else:
+        df = read_csv(path, source)
+    return df.astype({col: dtype for col, dtype in BUSINESS_DTYPES.items() if col in df.columns})
+
+
+def frame_memory(df):
+    """Resident size of a frame in bytes, including string and category payloads."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def log_memory(label, before, after):
+    logger.info("%s: %.1f MB -> %.1f MB (%.1fx smaller)", label, before / 1e6, after / 1e6, before / max(after, 1))
+
+
+# --- SNAPSHOTS ---
+def sources():
+    """``(snapshot name, path, parser)`` for every registered source, business last."""
+    return [
+        (
+            source.snapshot_name,
+            config.DATA_DIR / source.path,
+            partial(read_marketing_csv if source.kind == 'marketing' else read_business_csv, source=source),
+        )
+        for source in registry.registered()
+    ]
+
+
+def in_parallel(fn, items):
+    """``list(map(fn, items))`` on a thread pool.
+
+    The Arrow CSV reader and Parquet I/O release the GIL, so sources are
+    parsed concurrently and startup follows the core count, not the source count.
+    """
+    with ThreadPoolExecutor(max_workers=config.LOAD_WORKERS) as pool:
+        return list(pool.map(fn, items))
+
+
+def sources_fingerprint():
+    """Fingerprint of every source file, usable as a cache key."""
+    paths = [path for _, path, _ in sources()]
+    return tuple((str(path), path.stat().st_mtime_ns, path.stat().st_size) for path in paths)
+
+
+def sync_snapshot(name, path, parse):
+    """Brings one snapshot up to date, or returns None when it cannot be written."""
+    try:
+        return snapshots.sync(name, path, parse)
+    except OSError as e:
+        # A read-only deployment still works, it just parses on every cold start.
+        logger.warning("Could not update snapshot for %s: %s", name, e)
+        return None
+
+
+def snapshot_frame(name, path, parse, update):
+    """The parsed source once ``update`` (from :func:`sync_snapshot`) is applied.
+
+    A rebuild already returned the parsed frame, so only unchanged or appended
+    snapshots are read back from Parquet.
+    """
+    if update is None:
+        return parse(path)
+    return update.frame if update.kind == 'rebuild' else snapshots.read(name)
+
+
+def load_snapshot(name, path, parse):
+    """Returns the parsed source, served from its Parquet snapshot when possible."""
+    return snapshot_frame(name, path, parse, sync_snapshot(name, path, parse))
+
+
+# --- PREPARATION ---
+def load_sources():
+    """Loads every source concurrently; returns ``(df_marketing, df_business)``."""
+    *marketing_frames, df_business = in_parallel(lambda spec: load_snapshot(*spec), sources())
+    return concat_categorical(marketing_frames, DIMENSIONS), df_business
+
+
+def build_daily_performance(df_business, df_marketing):
+    """Joins daily marketing totals onto the business data and derives the efficiency metrics."""
+    df_marketing_daily = df_marketing.groupby('date').agg({col: 'sum' for col in MARKETING_MEASURES}).reset_index()
+    df_merged = pd.merge(df_business, df_marketing_daily, on='date', how='left')
+
+    for col in MARKETING_MEASURES:
+        df_merged[col] = df_merged[col].fillna(0)
+
+    # Keep in step with DAILY_RATIOS.
+    df_merged['roas'] = (df_merged['attributed_revenue'] / df_merged['spend']).fillna(0)
+    df_merged['cpc'] = (df_merged['spend'] / df_merged['clicks']).fillna(0)
+    df_merged['ctr'] = (df_merged['clicks'] / df_merged['impressions'] * 100).fillna(0)
+    df_merged['cpo'] = (df_merged['spend'] / df_merged['orders']).fillna(0)
+    df_merged['cac'] = (df_merged['spend'] / df_merged['new_customers']).fillna(0)
+    return df_merged
+
+
+def prepare_marketing(df_marketing):
+    """Materializes the row-level derived columns and categorical dimensions once."""
+    df_marketing['roas'] = (df_marketing['attributed_revenue'] / df_marketing['spend']).fillna(0).astype('float32')
+    return df_marketing
+
+
+def load_and_prepare_data():
+    """Returns ``(df_daily_performance, df_marketing)`` for the dashboard pages."""
+    df_marketing, df_business = load_sources()
+    df_marketing = prepare_marketing(df_marketing)
+    return build_daily_performance(df_business, df_marketing), df_marketing
+
+
+# --- SHARED DATASET ---
+@dataclass(frozen=True)
+class Dataset:
+    """The fully prepared frames, shared read-only by every page and session.
+
+    Pages select rows from these frames but never add or assign columns, so a
+    single instance can be handed to all reruns without copying it. ``marketing``
+    is sorted by ``(platform, date)`` and ``daily`` by ``date``; select date
+    ranges through :meth:`marketing_between` and :meth:`daily_between`.
+    """
+    daily: pd.DataFrame
+    marketing: pd.DataFrame
+    rollup: RollupCube = None
+    daily_index: DateIndex = None
+    marketing_index: DateIndex = None
+
+    @property
+    def empty(self):
+        return self.daily.empty and self.marketing.empty
+
+    def memory_usage(self):
+        """Bytes held by each shared frame."""
+        return {'daily': frame_memory(self.daily), 'marketing': frame_memory(self.marketing)}
+
+    def daily_between(self, start, end):
+        """Daily performance rows dated within ``[start, end]``."""
+        return self.daily_index.slice(start, end)
+
+    def marketing_between(self, start, end, platform=None):
+        """Marketing rows dated within ``[start, end]``, for one platform or all of them."""
+        return self.marketing_index.slice(start, end, platform)
+
+    def append(self, marketing_delta=None, business_delta=None):
+        """Returns a new Dataset that also holds the given newly ingested rows.
+
+        Only the dates from the earliest new row onward are recomputed: earlier
+        daily performance rows and rollup prefix sums are carried over as is,
+        and the new marketing rows are merged into the sorted frame in place.
+        """
+        deltas = [df for df in (marketing_delta, business_delta) if df is not None and len(df)]
+        if not deltas:
+            return self
+        since = min(df['date'].min() for df in deltas).normalize()
+
+        if marketing_delta is None or marketing_delta.empty:
+            marketing_delta = self.marketing.iloc[0:0]
+        else:
+            marketing_delta = prepare_marketing(marketing_delta)
+        marketing_index = self.marketing_index.append(marketing_delta)
+        marketing_tail = marketing_index.slice(since, pd.Timestamp.max)
+
+        business_columns = [col for col in self.daily.columns if col not in [*MARKETING_MEASURES, *DAILY_RATIOS]]
+        business_tail = self.daily_index.slice(since, pd.Timestamp.max)[business_columns]
+        if business_delta is not None and len(business_delta):
+            business_tail = pd.concat([business_tail, business_delta], ignore_index=True)
+        daily_tail = build_daily_performance(business_tail, marketing_tail)
+        daily_head = self.daily_index.slice(pd.Timestamp.min, since - pd.Timedelta(microseconds=1))
+        daily_index = DateIndex(pd.concat([daily_head, daily_tail], ignore_index=True))
+
+        if since < self.rollup.start:
+            rollup = RollupCube(marketing_index.frame, daily_index.frame)
+        else:
+            rollup = self.rollup.extend(marketing_delta, daily_tail, since)
+        return Dataset(
+            daily=daily_index.frame,
+            marketing=marketing_index.frame,
+            rollup=rollup,
+            daily_index=daily_index,
+            marketing_index=marketing_index,
+        )
+
+
+def build_dataset(df_marketing, df_business):
+    """Prepares the parsed sources into a :class:`Dataset`."""
+    df_marketing = prepare_marketing(df_marketing)
+    df_daily = build_daily_performance(df_business, df_marketing)
+    daily_index = DateIndex(df_daily)
+    marketing_index = DateIndex(df_marketing, partition='platform')
+    return Dataset(
+        daily=daily_index.frame,
+        marketing=marketing_index.frame,
+        rollup=RollupCube(df_marketing, df_daily),
+        daily_index=daily_index,
+        marketing_index=marketing_index,
+    )
+
+
+def load_dataset():
+    """Loads and prepares every source into a :class:`Dataset`."""
+    return build_dataset(*load_sources())
+
+
+def refresh_dataset(previous=None):
+    """Brings ``previous`` up to date with the source files.
+
+    When every changed file has only had rows appended, just those rows are
+    parsed and folded into ``previous``; otherwise the dataset is rebuilt from
+    the frames the sync parsed or, for untouched sources, their snapshots.
+    """
+    specs = sources()
+    updates = in_parallel(lambda spec: sync_snapshot(*spec), specs)
+    if previous is None or previous.rollup is None or any(u is None or u.kind == 'rebuild' for u in updates):
+        *marketing_frames, df_business = in_parallel(
+            lambda item: snapshot_frame(*item[0], item[1]), list(zip(specs, updates))
+        )
+        return build_dataset(concat_categorical(marketing_frames, DIMENSIONS), df_business)
+
+    *marketing_updates, business_update = updates
+    marketing_deltas = [u.delta for u in marketing_updates if u.kind == 'append']
+    return previous.append(
+        marketing_delta=concat_categorical(marketing_deltas, DIMENSIONS) if marketing_deltas else None,
+        business_delta=business_update.delta,
+    )
+
+
+class DatasetLoader:
+    """Holds the current :class:`Dataset` and refreshes it when a source file changes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dataset = None
+        self._fingerprint = None
+
+    def load(self):
+        fingerprint = sources_fingerprint()
+        with self._lock:
+            if self._dataset is None or fingerprint != self._fingerprint:
+                self._dataset = refresh_dataset(self._dataset)
+                self._fingerprint = fingerprint
+            return self._dataset
+
+
+EMPTY_DATASET = Dataset(daily=pd.DataFrame(), marketing=pd.DataFrame())
@@ -0,0 +1,84 @@
+# dashboard/downsample.py
+"""Thinning time series to a fixed point budget before they are charted.
+
+Every point of a Plotly figure is serialized into the page, so a chart over a
+long range costs payload and browser render time in proportion to its length.
+These helpers return at most ``max_points`` rows. They either pick the points
+that keep the line's visual shape (largest-triangle-three-buckets) or sum the
+rows into coarser calendar buckets.
+"""
+
+import numpy as np
+
+from dashboard import config
+
+# Coarser and coarser calendar buckets, tried in order until one fits.
+RESAMPLE_STEPS = [('W', 'Weekly'), ('MS', 'Monthly'), ('QS', 'Quarterly'), ('YS', 'Yearly')]
+
+
+def lttb_indices(x, y, n_out):
+    """Positions of the ``n_out`` points of ``(x, y)`` chosen by largest-triangle-three-buckets.
+
+    The first and last points are always kept. The rest are split into
+    ``n_out - 2`` buckets, and each bucket keeps the point forming the largest
+    triangle with the point kept before it and the mean of the next bucket.
+    """
+    n, n_out = len(x), max(n_out, 3)
+    if n_out >= n:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        next_x, next_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs(
+            (x[prev] - next_x) * (y[lo:hi] - y[prev]) - (x[prev] - x[lo:hi]) * (next_y - y[prev])
+        )
+        prev = lo + int(area.argmax())
+        selected[i + 1] = prev
+    return selected
+
+
+def lttb(df, x, columns, max_points):
+    """Rows of ``df`` kept by LTTB on each of ``columns``, at most ``max_points`` in total."""
+    per_series = max(3, max_points // len(columns))
+    x_values = df[x].to_numpy()
+    if np.issubdtype(x_values.dtype, np.datetime64):
+        x_values = x_values.astype('datetime64[ns]').astype(np.int64)
+    keep = np.unique(np.concatenate([lttb_indices(x_values, df[col].to_numpy(), per_series) for col in columns]))
+    return df.iloc[keep]
+
+
+def resample(df, x, columns, max_points):
+    """Sums ``columns`` into the finest calendar bucket that fits ``max_points``.
+
+    Returns the bucketed frame and the bucket's name (e.g. ``'Weekly'``).
+    """
+    for freq, granularity in RESAMPLE_STEPS:
+        bucketed = df.resample(freq, on=x)[columns].sum().reset_index()
+        if len(bucketed) <= max_points:
+            break
+    return bucketed, granularity
+
+
+def downsample(df, x, columns, max_points=None, method=None, granularity='Daily'):
+    """Returns ``df[[x, *columns]]`` cut down to ``max_points`` rows, and its granularity.
+
+    ``method`` is ``'lttb'`` or ``'bucket'`` (default: ``config.CHART_DOWNSAMPLE``).
+    The granularity is ``granularity`` unless rows were summed into buckets.
+    """
+    max_points = max_points or config.CHART_POINTS
+    method = method or config.CHART_DOWNSAMPLE
+    df = df[[x, *columns]]
+    if len(df) <= max_points:
+        return df, granularity
+    if method == 'bucket':
+        return resample(df, x, columns, max_points)
+    return lttb(df, x, columns, max_points), granularity
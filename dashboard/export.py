@@ -0,0 +1,52 @@
+# dashboard/export.py
+"""Serializing frames for download.
+
+CSV is written a chunk of rows at a time straight into the output buffer
+(gzip-compressed or not), so exporting never holds the whole file as a Python
+string next to its encoded bytes. Parquet is written columnar and compressed.
+"""
+
+import gzip
+import io
+
+# Export formats: display name, file extension and MIME type.
+FORMATS = {
+    'csv': ('CSV', '.csv', 'text/csv'),
+    'csv.gz': ('CSV (gzip)', '.csv.gz', 'application/gzip'),
+    'parquet': ('Parquet', '.parquet', 'application/vnd.apache.parquet'),
+}
+
+CSV_CHUNK_ROWS = 100_000
+
+
+def write_csv(df, stream, chunk_rows=CSV_CHUNK_ROWS):
+    """Writes ``df`` as UTF-8 CSV to the binary ``stream``, ``chunk_rows`` rows at a time."""
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='', write_through=True)
+    try:
+        for start in range(0, max(len(df), 1), chunk_rows):
+            df.iloc[start:start + chunk_rows].to_csv(text, index=False, header=start == 0)
+    finally:
+        text.detach()
+
+
+def to_bytes(df, fmt):
+    """``df`` serialized in one of :data:`FORMATS`."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; choose one of {sorted(FORMATS)}")
+    buffer = io.BytesIO()
+    if fmt == 'parquet':
+        df.to_parquet(buffer, index=False, compression='zstd')
+    elif fmt == 'csv.gz':
+        with gzip.GzipFile(fileobj=buffer, mode='wb') as stream:
+            write_csv(df, stream)
+    else:
+        write_csv(df, buffer)
+    return buffer.getvalue()
+
+
+def file_name(stem, fmt):
+    return f'{stem}{FORMATS[fmt][1]}'
+
+
+def mime_type(fmt):
+    return FORMATS[fmt][2]
@@ -0,0 +1,104 @@
+# dashboard/index.py
+"""Sorted date indexes for slicing frames by date range without boolean masks.
+
+A :class:`DateIndex` keeps its frame sorted by ``(partition, date)`` and remembers
+where each partition starts and stops. A date-range lookup is then two binary
+searches inside the partition and the result is a positional slice of the
+shared frame rather than a masked copy. New rows are merged into place with
+the same binary searches, so the frame is never sorted again.
+"""
+
+import numpy as np
+import pandas as pd
+
+from dashboard.schema import concat_categorical
+
+
+class DateIndex:
+    """A frame sorted by an optional partition column and ``date``."""
+
+    def __init__(self, df, partition=None):
+        self.frame = df.sort_values(self._keys(partition), kind='stable').reset_index(drop=True)
+        self.partition = partition
+        self._dates = self.frame['date'].to_numpy()
+        self._offsets = self._partition_offsets(self.frame, partition)
+
+    @staticmethod
+    def _keys(partition):
+        return [partition, 'date'] if partition else ['date']
+
+    @staticmethod
+    def _partition_offsets(frame, partition):
+        """``{partition value: (first row, end row)}`` of a sorted frame."""
+        if partition is None:
+            return {None: (0, len(frame))}
+        codes, values = pd.factorize(frame[partition], sort=False)
+        bounds = np.concatenate([[0], np.flatnonzero(np.diff(codes)) + 1, [len(codes)]])
+        return {values[i]: (int(bounds[i]), int(bounds[i + 1])) for i in range(len(values))}
+
+    def append(self, df):
+        """A new index over ``frame`` plus the rows of ``df``.
+
+        Each new row is placed after the existing rows of its partition dated
+        on or before it, found by binary search, so only ``df`` is sorted and
+        ``frame`` is copied once. A partition ``frame`` does not have yet is
+        sorted in from scratch.
+        """
+        if df.empty:
+            return self
+        df = df.sort_values(self._keys(self.partition), kind='stable').reset_index(drop=True)
+        new_offsets = self._partition_offsets(df, self.partition)
+        if not new_offsets.keys() <= self._offsets.keys():
+            return DateIndex(concat_categorical([self.frame, df], self.frame.select_dtypes('category').columns), self.partition)
+
+        # Row i of df goes after ``positions[i]`` rows of frame and the i new rows before it.
+        dates = df['date'].to_numpy()
+        positions = np.empty(len(df), dtype=np.intp)
+        for value, (a, b) in new_offsets.items():
+            lo, hi = self._offsets[value]
+            positions[a:b] = lo + np.searchsorted(self._dates[lo:hi], dates[a:b], side='right')
+        slots = positions + np.arange(len(df))
+        order = np.empty(len(self.frame) + len(df), dtype=np.intp)
+        is_new = np.zeros(len(order), dtype=bool)
+        is_new[slots] = True
+        order[slots] = len(self.frame) + np.arange(len(df))
+        order[~is_new] = np.arange(len(self.frame))
+
+        merged = concat_categorical([self.frame, df], self.frame.select_dtypes('category').columns)
+        index = object.__new__(DateIndex)
+        index.frame = merged.take(order).reset_index(drop=True)
+        index.partition = self.partition
+        index._dates = index.frame['date'].to_numpy()
+        # Every partition grows by its own new rows and moves by those of the partitions before it.
+        added = {value: b - a for value, (a, b) in new_offsets.items()}
+        index._offsets, shift = {}, 0
+        for value, (lo, hi) in self._offsets.items():
+            grown = added.get(value, 0)
+            index._offsets[value] = (lo + shift, hi + shift + grown)
+            shift += grown
+        return index
+
+    @property
+    def partitions(self):
+        """Partition values in sort order."""
+        return [value for value in self._offsets if value is not None]
+
+    def _bounds(self, start, end, lo, hi):
+        dates = self._dates[lo:hi]
+        left = np.searchsorted(dates, pd.Timestamp(start).to_datetime64(), side='left')
+        right = np.searchsorted(dates, pd.Timestamp(end).to_datetime64(), side='right')
+        return lo + int(left), lo + int(max(left, right))
+
+    def slice(self, start, end, partition=None):
+        """Rows dated within ``[start, end]``, restricted to ``partition`` when one is given.
+
+        Without a partition on a partitioned index the per-partition slices are
+        concatenated, which copies; with one, the result is a slice of ``frame``.
+        """
+        if partition is None and self.partition is not None:
+            pieces = [self.slice(start, end, value) for value in self.partitions]
+            return pd.concat(pieces) if pieces else self.frame.iloc[0:0]
+        if partition not in self._offsets:
+            return self.frame.iloc[0:0]
+        a, b = self._bounds(start, end, *self._offsets[partition])
+        return self.frame.iloc[a:b]
@@ -0,0 +1,104 @@
+# dashboard/ingest.py
+"""Chunked ingestion for exports too large to load in one piece.
+
+``stream_aggregate`` reads a CSV a bounded number of rows at a time, normalizes
+each chunk exactly like the whole-file loaders do, and folds it into running
+sums per key. Peak memory is set by the chunk size and the number of distinct
+keys (e.g. days x campaigns), not by the size of the file.
+
+The running sums are kept as one block per chunk, and a chunk's partial sums
+are only folded with the rows of earlier blocks on the days they share. For an
+export in date order that is just the day a chunk boundary splits, so each row
+is summed about once however many chunks the file takes.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+
+import pandas as pd
+
+from dashboard.schema import DATE_DTYPE, concat_categorical, normalize_columns
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IngestStats:
+    """Row throughput of one ingestion run."""
+    source: str
+    rows: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def log(self):
+        logger.info(
+            "Ingested %s: %d rows in %d chunks, %.2fs (%.0f rows/s)",
+            self.source, self.rows, self.chunks, self.seconds, self.rows_per_second,
+        )
+
+
+def read_chunks(path, renames, chunksize):
+    """Yields normalized chunks of a CSV export with parsed dates."""
+    with pd.read_csv(path, chunksize=chunksize) as reader:
+        for chunk in reader:
+            chunk = normalize_columns(chunk, renames)
+            chunk['date'] = pd.to_datetime(chunk['date']).astype(DATE_DTYPE)
+            yield chunk
+
+
+def _partial_sums(chunk, keys, measures):
+    """A chunk's sums per key, with the keys other than ``date`` as categoricals."""
+    partial = chunk.groupby(keys, sort=False, dropna=False)[measures].sum().reset_index()
+    return partial.astype({col: 'category' for col in keys if col != 'date'})
+
+
+def _fold(frames, keys, measures):
+    combined = concat_categorical(frames, [col for col in keys if col != 'date'])
+    return combined.groupby(keys, sort=False, dropna=False, observed=True)[measures].sum().reset_index()
+
+
+def stream_aggregate(path, renames, keys, measures=None, chunksize=1_000_000):
+    """Sums ``measures`` (default: every non-key column) per ``keys`` over a CSV, chunk by chunk.
+
+    ``keys`` must include ``date``. Returns the aggregated frame, sorted by
+    ``keys``, and the :class:`IngestStats` of the run.
+    """
+    stats = IngestStats(source=str(path))
+    started = time.perf_counter()
+    # Folded sums, and which block holds each day's rows.
+    blocks, block_of_day = [], {}
+
+    for chunk in read_chunks(path, renames, chunksize):
+        stats.rows += len(chunk)
+        stats.chunks += 1
+        measures = measures or [col for col in chunk.columns if col not in keys]
+        partial = _partial_sums(chunk, keys, measures)
+        days = partial['date'].unique()
+
+        earlier = {}
+        for day in days:
+            if day in block_of_day:
+                earlier.setdefault(block_of_day[day], []).append(day)
+        if earlier:
+            pulled = []
+            for i, shared in earlier.items():
+                mask = blocks[i]['date'].isin(shared).to_numpy()
+                pulled.append(blocks[i][mask])
+                blocks[i] = blocks[i][~mask]
+            partial = _fold([*pulled, partial], keys, measures)
+
+        block_of_day.update(dict.fromkeys(days, len(blocks)))
+        blocks.append(partial)
+
+    if not blocks:
+        stats.seconds = time.perf_counter() - started
+        return pd.DataFrame(columns=[*keys, *(measures or [])]), stats
+    folded = concat_categorical(blocks, [col for col in keys if col != 'date'])
+    folded = folded.sort_values(keys, kind='stable').reset_index(drop=True)
+    stats.seconds = time.perf_counter() - started
+    return folded, stats
@@ -0,0 +1,66 @@
+# dashboard/leaderboard.py
+"""Ranked, paged views of per-campaign performance.
+
+A page of the leaderboard is found with partial selection (``nlargest`` or
+``nsmallest``) rather than by sorting every campaign, and only that page is
+handed to the table for formatting. Work per page grows with how deep the page
+is, not with the number of campaigns.
+"""
+
+import math
+
+import pandas as pd
+
+# Metrics a leaderboard can be ranked by, with their display names.
+METRICS = {
+    'roas': 'ROAS',
+    'cpc': 'CPC',
+    'ctr': 'CTR',
+    'spend': 'Spend',
+    'attributed_revenue': 'Attributed Revenue',
+    'clicks': 'Clicks',
+    'impressions': 'Impressions',
+}
+
+FORMATS = {
+    'spend': '${:,.2f}',
+    'attributed_revenue': '${:,.2f}',
+    'roas': '{:.2f}x',
+    'cpc': '${:,.2f}',
+    'ctr': '{:.2f}%',
+}
+
+
+def with_campaign_ratios(df):
+    """Adds ROAS, CPC and CTR (in percent) to per-campaign sums."""
+    return df.assign(
+        roas=(df['attributed_revenue'] / df['spend']).fillna(0),
+        cpc=(df['spend'] / df['clicks']).fillna(0),
+        ctr=(df['clicks'] / df['impressions'] * 100).fillna(0),
+    )
+
+
+class Leaderboard:
+    """Campaigns ranked by one metric, served a page at a time."""
+
+    def __init__(self, campaigns, metric='roas', ascending=False):
+        if metric not in METRICS:
+            raise ValueError(f"Cannot rank by {metric!r}; choose one of {sorted(METRICS)}")
+        self.campaigns = campaigns
+        self.metric = metric
+        self.ascending = ascending
+
+    def __len__(self):
+        return len(self.campaigns)
+
+    def top(self, k):
+        """The ``k`` best campaigns (the ``k`` lowest when ascending), in rank order."""
+        select = pd.DataFrame.nsmallest if self.ascending else pd.DataFrame.nlargest
+        return select(self.campaigns, k, self.metric)
+
+    def n_pages(self, page_size):
+        return max(1, math.ceil(len(self) / page_size))
+
+    def page(self, number, page_size):
+        """Rows of page ``number`` (from 0), in rank order."""
+        return self.top((number + 1) * page_size).iloc[number * page_size:]
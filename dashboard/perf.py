@@ -0,0 +1,179 @@
+# dashboard/perf.py
+"""Opt-in timings of page sections and hit counts of the shared caches.
+
+With ``BI_PERF`` set, each page run records how long its named sections take
+(load, filter, aggregate, chart, table). Cached functions count their
+calls and misses. Every run is logged as one JSON record, appended to
+``BI_PERF_LOG`` if set, and shown in a sidebar panel. Exports run after the
+page, so each is logged as a record of its own. With ``BI_PERF`` unset,
+``section`` returns a shared no-op context manager and nothing is counted.
+"""
+
+import contextlib
+import functools
+import json
+import logging
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from dashboard import config
+
+logger = logging.getLogger(__name__)
+
+_NOOP = contextlib.nullcontext()
+
+# Streamlit runs each session's script on its own thread, so the run being
+# recorded is tracked per thread.
+_local = threading.local()
+
+_cache_lock = threading.Lock()
+_cache_counts = defaultdict(lambda: {'calls': 0, 'misses': 0})
+
+
+class PageRun:
+    """Section timings of one run of a page script."""
+
+    def __init__(self, page):
+        self.page = page
+        self.started = time.perf_counter()
+        self.sections = defaultdict(float)
+
+    @contextlib.contextmanager
+    def section(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.sections[name] += time.perf_counter() - started
+
+    def record(self):
+        rss = rss_mb()
+        return {
+            'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'page': self.page,
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'sections_ms': {name: round(seconds * 1000, 2) for name, seconds in self.sections.items()},
+            'cache': cache_stats(),
+            'rss_mb': None if rss is None else round(rss, 1),
+        }
+
+
+def start(page):
+    """Starts recording a run of ``page`` on this thread."""
+    _local.run = PageRun(page) if config.PERF else None
+
+
+def section(name):
+    """Context manager timing ``name`` within the current page run."""
+    run = getattr(_local, 'run', None)
+    return run.section(name) if run is not None else _NOOP
+
+
+def finish():
+    """Ends the current page run, emits its record and returns it (None when disabled)."""
+    run = getattr(_local, 'run', None)
+    if run is None:
+        return None
+    _local.run = None
+    record = run.record()
+    line = json.dumps(record)
+    logger.info("perf %s", line)
+    if config.PERF_LOG:
+        try:
+            with open(config.PERF_LOG, 'a') as f:
+                f.write(line + '\n')
+        except OSError as e:
+            logger.warning("Could not write performance metrics to %s: %s", config.PERF_LOG, e)
+    return record
+
+
+@contextlib.contextmanager
+def deferred(page, name):
+    """Times ``name`` as a section of this thread's page run, or as a run of ``page`` of its own.
+
+    Streamlit calls a download button's data callable after the script run,
+    on another thread, where no page run is being recorded.
+    """
+    if not config.PERF or getattr(_local, 'run', None) is not None:
+        with section(name):
+            yield
+        return
+    start(page)
+    try:
+        with section(name):
+            yield
+    finally:
+        finish()
+
+
+# --- CACHE COUNTERS ---
+def count_misses(name):
+    """Decorates the body of a cached function: every execution is a cache miss."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if config.PERF:
+                with _cache_lock:
+                    _cache_counts[name]['misses'] += 1
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count_calls(name):
+    """Decorates a cached function: every call is a lookup, whether it hits or not."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if config.PERF:
+                with _cache_lock:
+                    _cache_counts[name]['calls'] += 1
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def cache_stats():
+    """Calls, hits, misses and hit rate of every counted cache since the process started."""
+    with _cache_lock:
+        counts = {name: dict(count) for name, count in _cache_counts.items()}
+    return {
+        name: {
+            **count,
+            'hits': count['calls'] - count['misses'],
+            'hit_rate': round((count['calls'] - count['misses']) / count['calls'], 3) if count['calls'] else None,
+        }
+        for name, count in sorted(counts.items())
+    }
+
+
+def rss_mb():
+    """Resident memory of the process, its peak where the current value is unavailable, or None on Windows."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * resource.getpagesize() / 1e6
+    except OSError:
+        # ru_maxrss is in KiB on Linux and in bytes on macOS.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024) / 1e6
+
+
+def show_panel(record):
+    """Renders ``record`` (from :func:`finish`) in a sidebar "Performance" panel."""
+    import pandas as pd
+    import streamlit as st
+
+    with st.sidebar.expander("⏱️ Performance"):
+        memory = f" · RSS {record['rss_mb']:,.0f} MB" if record['rss_mb'] is not None else ""
+        st.caption(f"This run: {record['total_ms']:,.0f} ms{memory}")
+        sections = pd.Series(record['sections_ms'], name='ms', dtype=float).rename_axis('section').reset_index()
+        st.dataframe(sections.style.format({'ms': '{:,.1f}'}), hide_index=True)
+        caches = pd.DataFrame.from_dict(record['cache'], orient='index').rename_axis('cache').reset_index()
+        if not caches.empty:
+            st.dataframe(caches[['cache', 'calls', 'hits', 'misses', 'hit_rate']], hide_index=True)
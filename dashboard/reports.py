@@ -0,0 +1,153 @@
+# dashboard/reports.py
+"""Page computations that do not need Streamlit.
+
+The insights, period-over-period KPIs and the campaign table are computed here
+from a backend (see :mod:`dashboard.backend`), so the pages and the batch
+report runner (:mod:`dashboard.batch`) share one implementation.
+"""
+
+from dataclasses import dataclass
+from datetime import timedelta
+
+import pandas as pd
+
+from dashboard.anomaly import METRICS as ANOMALY_METRICS
+from dashboard.leaderboard import Leaderboard, with_campaign_ratios
+
+REPORT_KINDS = ('overview', 'channel', 'campaigns')
+
+OVERVIEW_METRICS = ['total_revenue', 'gross_profit', 'spend', 'roas', 'cac']
+
+ANOMALY_FORMATS = {'roas': '{:.2f}x', 'ctr': '{:.2%}', 'cac': '${:,.2f}'}
+
+
+def key_insights(platform_perf):
+    """Best and worst platform by ROAS, from per-platform sums."""
+    if platform_perf.empty: return "No data available for insights."
+    platform_perf = platform_perf.assign(roas=(platform_perf['attributed_revenue'] / platform_perf['spend']).fillna(0))
+    best_platform = platform_perf.loc[platform_perf['roas'].idxmax()]
+    worst_platform = platform_perf.loc[platform_perf['roas'].idxmin()]
+    insight1 = f"🚀 **Top Performer**: **{best_platform['platform']}** is driving the highest return with a **{best_platform['roas']:.2f}x ROAS**."
+    insight2 = f"📉 **Area for Review**: **{worst_platform['platform']}** shows the lowest efficiency with a **{worst_platform['roas']:.2f}x ROAS**."
+    return f"{insight1}\n{insight2}"
+
+
+def channel_insights(tactic_perf, platform):
+    """The most efficient tactic of a channel, from its per-tactic sums."""
+    if tactic_perf.empty: return "No data for insights."
+    tactic_perf = tactic_perf.assign(roas=(tactic_perf['attributed_revenue'] / tactic_perf['spend']).fillna(0))
+    if tactic_perf.empty or tactic_perf['roas'].max() == 0: return "Not enough data for tactic comparison."
+    best_tactic = tactic_perf.loc[tactic_perf['roas'].idxmax()]
+    return f"On **{platform}**, the **'{best_tactic['tactic']}'** tactic is the most efficient, with a **{best_tactic['roas']:.2f}x ROAS**."
+
+
+def anomaly_insights(flags, start, end, platform=None, limit=5):
+    """The most anomalous of ``flags`` (see :mod:`dashboard.anomaly`) dated within ``[start, end]``, as a list."""
+    flags = flags[(flags['date'] >= start) & (flags['date'] <= end)]
+    if platform is not None:
+        flags = flags[flags['platform'] == platform]
+    if flags.empty: return ""
+    lines = []
+    for flag in flags.head(limit).itertuples():
+        fmt = ANOMALY_FORMATS[flag.metric]
+        lines.append(
+            f"- ⚠️ **{ANOMALY_METRICS[flag.metric][2]}**: **{flag.label}** on {flag.date:%b %d}: "
+            f"{fmt.format(flag.value)} vs. a typical {fmt.format(flag.median)} (robust z {flag.z:+.1f})."
+        )
+    if len(flags) > limit:
+        lines.append(f"- …and {len(flags) - limit:,} more.")
+    return "\n".join(lines)
+
+
+def previous_period(start, end):
+    """The period of the same length that ends the day before ``start``."""
+    duration = end - start
+    return start - duration - timedelta(days=1), end - duration - timedelta(days=1)
+
+
+def period_kpis(backend, start, end):
+    """KPIs of ``[start, end]`` and of the period before it, as ``(current, previous)``."""
+    return backend.kpis(start, end), backend.kpis(*previous_period(start, end))
+
+
+def ratio_breakdown(backend, start, end, by, platform=None):
+    """Per-``by`` sums with their ROAS."""
+    df = backend.breakdown(start, end, by, platform=platform)
+    df['roas'] = (df['attributed_revenue'] / df['spend']).fillna(0)
+    return df
+
+
+def campaign_table(backend, start, end, platform=None):
+    """Spend, revenue, clicks, impressions, ROAS, CPC and CTR per campaign."""
+    return with_campaign_ratios(backend.breakdown(
+        start, end, ['platform', 'campaign'], platform=platform,
+    )[['platform', 'campaign', 'spend', 'attributed_revenue', 'clicks', 'impressions']])
+
+
+# --- BATCH REPORTS ---
+@dataclass(frozen=True)
+class ReportSpec:
+    """One report to produce: its kind, date range and optional platform/campaign filter."""
+    name: str
+    kind: str
+    start: pd.Timestamp
+    end: pd.Timestamp
+    platform: str = None
+    campaign: str = None
+
+    def __post_init__(self):
+        if self.kind not in REPORT_KINDS:
+            raise ValueError(f"Report kind must be one of {REPORT_KINDS}, not {self.kind!r}")
+        if self.kind == 'channel' and self.platform is None:
+            raise ValueError(f"Channel report {self.name!r} needs a platform")
+        if self.campaign is not None and self.kind != 'campaigns':
+            raise ValueError(f"Only campaigns reports filter by campaign, not {self.kind} report {self.name!r}")
+
+
+@dataclass
+class Report:
+    """A report's table and its one-line insight."""
+    spec: ReportSpec
+    frame: pd.DataFrame
+    insight: str
+
+
+def overview_report(backend, spec):
+    current, previous = period_kpis(backend, spec.start, spec.end)
+    frame = pd.DataFrame({
+        'metric': OVERVIEW_METRICS,
+        'current': [float(current[m]) for m in OVERVIEW_METRICS],
+        'previous': [float(previous[m]) for m in OVERVIEW_METRICS],
+    })
+    frame['change'] = frame['current'] - frame['previous']
+    return frame, key_insights(backend.breakdown(spec.start, spec.end, 'platform'))
+
+
+def channel_report(backend, spec):
+    tactics = ratio_breakdown(backend, spec.start, spec.end, 'tactic', spec.platform)
+    states = ratio_breakdown(backend, spec.start, spec.end, 'state', spec.platform)
+    frame = pd.concat([
+        tactics.rename(columns={'tactic': 'value'}).assign(dimension='tactic'),
+        states.rename(columns={'state': 'value'}).assign(dimension='state'),
+    ], ignore_index=True)
+    frame = frame[['dimension', 'value', *[col for col in frame.columns if col not in ('dimension', 'value')]]]
+    return frame, channel_insights(tactics, spec.platform)
+
+
+def campaigns_report(backend, spec):
+    frame = campaign_table(backend, spec.start, spec.end, spec.platform)
+    if spec.campaign is not None:
+        frame = frame[frame['campaign'] == spec.campaign]
+    if frame.empty:
+        return frame, "No campaigns in range."
+    best = Leaderboard(frame, 'roas').top(1).iloc[0]
+    return frame, f"**{best['campaign']}** has the highest ROAS, **{best['roas']:.2f}x**."
+
+
+_REPORTS = {'overview': overview_report, 'channel': channel_report, 'campaigns': campaigns_report}
+
+
+def run_report(backend, spec):
+    """Computes ``spec`` against ``backend``."""
+    frame, insight = _REPORTS[spec.kind](backend, spec)
+    return Report(spec, frame.reset_index(drop=True), insight)
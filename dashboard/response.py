@@ -0,0 +1,155 @@
+# dashboard/response.py
+"""Diminishing-returns response curves and the budget split they recommend.
+
+Each channel's daily attributed revenue is modelled as
+``ceiling * (1 - exp(-spend / scale))``: close to linear at low spend and
+flattening out towards ``ceiling`` as spend grows. The fit is a grid search
+over ``scale`` with the least-squares ``ceiling`` solved in closed form for
+every grid point at once, and the optimizer scores thousands of candidate
+allocations per call as one array operation.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Candidate scales, as multiples of the largest daily spend observed. The top
+# end is far enough out that a channel with no visible saturation fits as
+# (nearly) linear.
+SCALE_GRID = np.geomspace(0.05, 100, 96)
+
+# The fitted curves are only drawn out to this multiple of each channel's
+# largest observed daily spend; beyond it they are pure extrapolation.
+CURVE_SPEND_MULTIPLE = 2
+
+CANDIDATES = 4096
+ROUNDS = 3
+
+
+@dataclass(frozen=True)
+class ResponseCurves:
+    """Fitted curves for a set of channels, as arrays aligned with ``channels``."""
+    channels: tuple
+    ceiling: np.ndarray
+    scale: np.ndarray
+    r2: np.ndarray
+    days: np.ndarray
+    max_spend: np.ndarray
+
+    @property
+    def at_grid_edge(self):
+        """Channels whose fit is the most linear scale on the grid: the data shows no saturation."""
+        return self.scale >= self.max_spend * SCALE_GRID[-1] * (1 - 1e-9)
+
+    def revenue(self, allocations, horizon_days=1):
+        """Projected revenue per channel for ``allocations`` spent evenly over ``horizon_days``.
+
+        ``allocations`` may be one split (``n_channels``) or a batch of them
+        (``n_candidates x n_channels``).
+        """
+        daily_spend = np.asarray(allocations, dtype=float) / horizon_days
+        return horizon_days * self.ceiling * -np.expm1(-daily_spend / self.scale)
+
+    def marginal_roas(self, allocations, horizon_days=1):
+        """Revenue returned by the next dollar on each channel at ``allocations``."""
+        daily_spend = np.asarray(allocations, dtype=float) / horizon_days
+        return self.ceiling / self.scale * np.exp(-daily_spend / self.scale)
+
+    def table(self):
+        return pd.DataFrame({
+            'channel': list(self.channels),
+            'ceiling': self.ceiling,
+            'scale': self.scale,
+            'r2': self.r2,
+            'days': self.days,
+            'max_spend': self.max_spend,
+            'at_grid_edge': self.at_grid_edge,
+        })
+
+
+def fit_curve(spend, revenue):
+    """Least-squares ``(ceiling, scale, r2)`` for one channel's daily spend and revenue."""
+    spend = np.asarray(spend, dtype=float)
+    revenue = np.asarray(revenue, dtype=float)
+    if len(spend) == 0 or spend.max() <= 0:
+        return 0.0, 1.0, 0.0
+
+    scales = spend.max() * SCALE_GRID
+    x = -np.expm1(-spend[:, None] / scales)
+    ceiling = np.maximum((x * revenue[:, None]).sum(axis=0) / (x * x).sum(axis=0), 0)
+    sse = ((revenue[:, None] - x * ceiling) ** 2).sum(axis=0)
+    best = sse.argmin()
+
+    sst = ((revenue - revenue.mean()) ** 2).sum()
+    r2 = 1 - sse[best] / sst if sst > 0 else 0.0
+    return float(ceiling[best]), float(scales[best]), float(r2)
+
+
+def channel_columns(by):
+    """The columns that identify a channel at level ``by``.
+
+    Tactic (and campaign) names repeat across platforms, e.g. Facebook's and
+    TikTok's "Prospecting", so below the platform level channels are split by
+    platform as well.
+    """
+    return ['platform'] if by == 'platform' else ['platform', by]
+
+
+def channel_label(key):
+    """A channel's display name from its :func:`channel_columns` values, e.g. "TikTok / Prospecting"."""
+    return ' / '.join(map(str, key)) if isinstance(key, tuple) else str(key)
+
+
+def fit_curves(daily, by):
+    """Fits one curve per channel at level ``by`` from daily ``spend`` and ``attributed_revenue`` rows."""
+    fits = pd.DataFrame(
+        [
+            (channel_label(key), *fit_curve(group['spend'], group['attributed_revenue']), len(group), group['spend'].max())
+            for key, group in daily.groupby(channel_columns(by), observed=True)
+        ],
+        columns=['channel', 'ceiling', 'scale', 'r2', 'days', 'max_spend'],
+    )
+    return ResponseCurves(
+        channels=tuple(fits['channel']),
+        ceiling=fits['ceiling'].to_numpy(dtype=float),
+        scale=fits['scale'].to_numpy(dtype=float),
+        r2=fits['r2'].to_numpy(dtype=float),
+        days=fits['days'].to_numpy(dtype=int),
+        max_spend=fits['max_spend'].to_numpy(dtype=float),
+    )
+
+
+def optimize(curves, budget, horizon_days=1, candidates=CANDIDATES, rounds=ROUNDS):
+    """Returns the split of ``budget`` across ``curves.channels`` with the highest projected revenue.
+
+    The curves are concave, so at the optimum every funded channel returns the
+    same marginal ROAS and any channel whose first dollar returns less gets
+    nothing. Each round scores ``candidates`` levels of that marginal ROAS as
+    one batch of allocations and narrows in on the level that spends exactly
+    ``budget``.
+    """
+    allocation = np.zeros(len(curves.channels))
+    initial_roas = np.divide(curves.ceiling, curves.scale, out=allocation.copy(), where=curves.scale > 0)
+    if budget <= 0 or not (initial_roas > 0).any():
+        return allocation
+
+    def allocations(log_levels):
+        levels = np.exp(log_levels)[:, None]
+        return horizon_days * curves.scale * np.log(np.maximum(initial_roas / levels, 1))
+
+    # Searched in log space, from the best first-dollar ROAS (nothing spent)
+    # down to a level low enough to spend the whole budget.
+    high = np.log(initial_roas.max())
+    low = high - 1
+    while allocations(np.array([low])).sum() < budget:
+        low = high - 2 * (high - low)
+
+    for _ in range(rounds):
+        levels = np.linspace(low, high, candidates)
+        spent = allocations(levels).sum(axis=1)
+        i = np.searchsorted(-spent, -budget, side='right') - 1
+        low, high = levels[i], levels[min(i + 1, candidates - 1)]
+
+    allocation = allocations(np.array([low]))[0]
+    return allocation * (budget / allocation.sum())
@@ -0,0 +1,258 @@
+# dashboard/rollup.py
+"""Pre-aggregated daily rollups with prefix sums for constant-time date-range totals.
+
+The marketing rows are summed once per (date, platform, tactic, state, campaign).
+For any coarser level of those dimensions the daily totals are laid out on a
+dense day axis and cumulatively summed, so the total over ``[start, end]`` is
+``prefix[end + 1] - prefix[start]`` whatever the length of the history. Prefix
+sums are kept in day segments so a refresh only writes the days it recomputes.
+
+A level whose dense prefix sums would outgrow ``MAX_PREFIX_BYTES`` (campaigns
+over a long history, say) is not laid out at all: its totals are summed from
+the grouped rows of the requested days, which are sorted by day.
+"""
+
+import bisect
+import copy
+
+import numpy as np
+import pandas as pd
+
+from dashboard.schema import BUSINESS_MEASURES, COUNT_MEASURES, DIMENSIONS, MARKETING_MEASURES, concat_categorical
+
+_TOTAL_KEYS = pd.DataFrame(index=[0])
+
+# Prefix segments are merged back into one array once there are this many.
+MAX_SEGMENTS = 16
+
+# Largest dense prefix array kept for one level; it grows with days x keys.
+MAX_PREFIX_BYTES = 32 * 2**20
+
+_ROW_MEASURES = [*MARKETING_MEASURES, 'rows']
+
+
+def safe_ratio(numerator, denominator, scale=1):
+    """``numerator / denominator * scale``, or 0 when the denominator is not positive."""
+    return numerator / denominator * scale if denominator > 0 else 0
+
+
+def with_ratios(sums):
+    """Adds the efficiency ratios derived from additive sums."""
+    sums = sums.copy()
+    sums['roas'] = safe_ratio(sums['attributed_revenue'], sums['spend'])
+    sums['cpc'] = safe_ratio(sums['spend'], sums['clicks'])
+    sums['ctr'] = safe_ratio(sums['clicks'], sums['impressions'], scale=100)
+    if 'new_customers' in sums:
+        sums['cac'] = safe_ratio(sums['spend'], sums['new_customers'])
+    return sums
+
+
+class _Segments:
+    """Prefix sums stored as consecutive blocks of days.
+
+    Replacing the days from some point on keeps the earlier blocks as views,
+    so the cost follows the number of replaced days; the blocks are merged
+    once every ``MAX_SEGMENTS`` replacements.
+    """
+
+    def __init__(self, blocks):
+        self._blocks = [block for block in blocks if len(block)]
+        self._starts = np.cumsum([0, *(len(block) for block in self._blocks)]).tolist()
+
+    def __len__(self):
+        return self._starts[-1]
+
+    def __getitem__(self, i):
+        k = bisect.bisect_right(self._starts, i) - 1
+        return self._blocks[k][i - self._starts[k]]
+
+    def rows(self, a, b):
+        """Rows ``a`` to ``b - 1``; past the end the last row repeats, as no day there has any sums."""
+        parts = [
+            block[max(a - start, 0):b - start]
+            for start, block in zip(self._starts, self._blocks)
+            if start < b and start + len(block) > a
+        ]
+        out = np.concatenate([self._blocks[0][:0], *parts])
+        if len(out) < b - a:
+            out = np.concatenate([out, np.repeat(self[len(self) - 1][None], b - a - len(out), axis=0)])
+        return out
+
+    def replaced_from(self, n, block):
+        """These prefix sums with every row from ``n`` on replaced by ``block``."""
+        blocks = [block_[:n - start] for start, block_ in zip(self._starts, self._blocks) if start < n]
+        blocks.append(block)
+        return _Segments([np.concatenate(blocks)] if len(blocks) > MAX_SEGMENTS else blocks)
+
+
+class RollupCube:
+    """Prefix-summed daily totals of the marketing (and business) measures.
+
+    ``daily`` is the merged daily performance frame; it backs the all-platform
+    totals so they match the Homepage's business-date view of the data.
+    """
+
+    def __init__(self, marketing, daily):
+        dates = pd.concat([marketing['date'], daily['date']])
+        self.start = dates.min().normalize()
+        self.n_days = (dates.max().normalize() - self.start).days + 1
+        self._chunks = [self._group_rows(marketing)]
+        self._total_measures = [col for col in MARKETING_MEASURES + BUSINESS_MEASURES if col in daily.columns]
+        self._prefixes = {(): (_TOTAL_KEYS, self._total_measures, _Segments([self._total_prefix(daily, 0)]))}
+
+    def _group_rows(self, marketing):
+        """Daily per-group rows, sorted by day, as ``(dimensions, day offsets, measure values)``.
+
+        Appended rows are grouped on their own into a further chunk, so the same
+        group and day may appear in more than one chunk; the sums still add up.
+        """
+        rows = marketing.groupby(['date', *DIMENSIONS], observed=True)[MARKETING_MEASURES].sum().reset_index()
+        # A trailing column of ones counts the rows behind each total.
+        values = np.column_stack([rows[MARKETING_MEASURES].to_numpy(dtype='float64'), np.ones(len(rows))])
+        return rows[DIMENSIONS], self._day_offsets(rows['date']), values
+
+    def _day_offsets(self, dates):
+        return ((dates.dt.normalize() - self.start) // pd.Timedelta(days=1)).to_numpy(dtype='int64')
+
+    def _position(self, date, offset=0):
+        """Number of days of history before ``date`` (plus ``offset``), clipped to the cube."""
+        return int(np.clip((pd.Timestamp(date).normalize() - self.start).days + offset, 0, self.n_days))
+
+    @staticmethod
+    def _accumulate(slots, codes, values, n_slots, n_keys):
+        """Cumulative sums over ``n_slots`` day slots of ``values`` binned by (slot, key code)."""
+        flat = slots * n_keys + codes
+        grid = np.stack([
+            np.bincount(flat, weights=values[:, i], minlength=n_slots * n_keys)
+            for i in range(values.shape[1])
+        ], axis=-1).reshape(n_slots, n_keys, values.shape[1])
+        return np.cumsum(grid, axis=0)
+
+    def _total_prefix(self, daily, since_day):
+        """Prefix sums of the all-platform totals for days from ``since_day`` on."""
+        days = self._day_offsets(daily['date']) - since_day
+        values = daily[self._total_measures].to_numpy(dtype='float64')
+        return self._accumulate(days + 1, np.zeros(len(days), dtype='int64'), values, self.n_days - since_day + 1, 1)
+
+    def _rows(self):
+        """Every grouped row as one chunk sorted by day, merging the appended chunks on first use."""
+        if len(self._chunks) > 1:
+            rows, days, values = zip(*self._chunks)
+            days = np.concatenate(days)
+            order = np.argsort(days, kind='stable')
+            rows = concat_categorical(rows, DIMENSIONS).take(order).reset_index(drop=True)
+            self._chunks = [(rows, days[order], np.concatenate(values)[order])]
+        return self._chunks[0]
+
+    @staticmethod
+    def _too_large(n_days, n_keys):
+        return (n_days + 1) * n_keys * len(_ROW_MEASURES) * 8 > MAX_PREFIX_BYTES
+
+    def _prefix(self, level):
+        """Returns ``(keys, measures, prefix)`` for a tuple of dimensions, building it on first use.
+
+        Returns None for a level too large to lay out densely (see :meth:`_too_large`).
+        """
+        if level not in self._prefixes:
+            rows, row_days, row_values = self._rows()
+            grouped = rows.groupby(list(level), observed=True, sort=True)
+            keys = grouped.size().index.to_frame(index=False)
+            if self._too_large(self.n_days, len(keys)):
+                self._prefixes[level] = None
+            else:
+                prefix = self._accumulate(row_days + 1, grouped.ngroup().to_numpy(), row_values, self.n_days + 1, len(keys))
+                self._prefixes[level] = (keys, _ROW_MEASURES, _Segments([prefix]))
+        return self._prefixes[level]
+
+    def _row_sums(self, level, lo, hi):
+        """``(keys, sums)`` of the grouped rows on days ``lo`` to ``hi - 1``, for levels without prefix sums."""
+        rows, values = [], []
+        for chunk_rows, days, chunk_values in self._chunks:
+            a, b = np.searchsorted(days, [lo, hi])
+            rows.append(chunk_rows.iloc[a:b][list(level)])
+            values.append(chunk_values[a:b])
+        frame = pd.concat([
+            concat_categorical(rows, level) if len(rows) > 1 else rows[0].reset_index(drop=True),
+            pd.DataFrame(np.concatenate(values), columns=_ROW_MEASURES),
+        ], axis=1)
+        sums = frame.groupby(list(level), observed=True, sort=True)[_ROW_MEASURES].sum()
+        return sums.index.to_frame(index=False), sums.reset_index(drop=True)
+
+    def extend(self, marketing_delta, daily_tail, since):
+        """Returns a cube that also holds ``marketing_delta`` and whose totals from ``since`` on are ``daily_tail``.
+
+        ``marketing_delta`` holds only the new marketing rows, none dated before
+        ``since``; ``daily_tail`` must hold every daily row dated ``since`` or
+        later. Prefix sums before ``since`` are reused and the new rows are added
+        onto the later ones, so the cost follows the number of recomputed days
+        and new rows rather than the length of the history.
+        """
+        cube = copy.copy(self)
+        since_day = self._position(since)
+        ends = [df['date'].max().normalize() for df in (marketing_delta, daily_tail) if len(df)]
+        cube.n_days = max([self.n_days, *((end - self.start).days + 1 for end in ends)])
+        tail_days = cube.n_days - since_day
+
+        rows, row_days, row_values = cube._group_rows(marketing_delta)
+        if len(rows):
+            cube._chunks = [*self._chunks, (rows, row_days, row_values)]
+
+        cube._prefixes = {}
+        # Page threads may add levels to self._prefixes (see _prefix) while this runs.
+        for level, entry in list(self._prefixes.items()):
+            if entry is None:
+                cube._prefixes[level] = None
+                continue
+            keys, measures, prefix = entry
+            if level == ():
+                tail = prefix[since_day] + cube._total_prefix(daily_tail, since_day)[1:]
+            else:
+                codes = pd.MultiIndex.from_frame(keys).get_indexer(pd.MultiIndex.from_frame(rows[list(level)]))
+                if (codes < 0).any() or self._too_large(cube.n_days, len(keys)):
+                    continue  # new keys, or too large now: decided again on next use
+                added = cube._accumulate(row_days - since_day + 1, codes, row_values, tail_days + 1, len(keys))
+                tail = prefix.rows(since_day + 1, cube.n_days + 1) + added[1:]
+            cube._prefixes[level] = (keys, measures, prefix.replaced_from(since_day + 1, tail))
+        return cube
+
+    def _range(self, level, start, end):
+        lo, hi = self._position(start), self._position(end, offset=1)
+        hi = max(hi, lo)
+        entry = self._prefix(level)
+        if entry is None:
+            return self._row_sums(level, lo, hi)
+        keys, measures, prefix = entry
+        return keys, pd.DataFrame(prefix[hi] - prefix[lo], columns=measures)
+
+    def totals(self, start, end, platform=None):
+        """Sums of every measure over ``[start, end]``, optionally for one platform."""
+        if platform is None:
+            _, sums = self._range((), start, end)
+            sums = sums.iloc[0]
+        else:
+            keys, sums = self._range(('platform',), start, end)
+            match = sums[(keys['platform'] == platform).to_numpy()]
+            sums = match.iloc[0].drop('rows') if len(match) else pd.Series(0.0, index=MARKETING_MEASURES)
+        return self._round_counts(sums.astype(object))
+
+    def breakdown(self, start, end, by, platform=None):
+        """Sums over ``[start, end]`` per value of the dimension(s) ``by``, optionally for one platform."""
+        by = [by] if isinstance(by, str) else list(by)
+        level = tuple(dict.fromkeys(['platform', *by] if platform is not None else by))
+        keys, sums = self._range(level, start, end)
+        frame = pd.concat([keys, sums], axis=1)
+        if platform is not None:
+            frame = frame[frame['platform'] == platform]
+        frame = frame[frame['rows'] > 0].reset_index(drop=True)
+        frame = frame[[*by, *MARKETING_MEASURES]]
+        return frame.astype({col: 'int64' for col in COUNT_MEASURES if col in frame.columns})
+
+    def kpis(self, start, end, platform=None):
+        """:meth:`totals` plus the ROAS, CPC, CTR and (all-platform) CAC ratios."""
+        return with_ratios(self.totals(start, end, platform))
+
+    @staticmethod
+    def _round_counts(sums):
+        for col in COUNT_MEASURES & set(sums.index):
+            sums[col] = int(round(sums[col]))
+        return sums
@@ -0,0 +1,61 @@
+# dashboard/schema.py
+"""Column names and dtypes shared by the loaders and the aggregation code."""
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+MARKETING_RENAMES = {'impression': 'impressions', 'attributed revenue': 'attributed_revenue'}
+BUSINESS_RENAMES = {
+    '# of orders': 'orders',
+    '# of new orders': 'new_orders',
+    'new customers': 'new_customers',
+    'total revenue': 'total_revenue',
+    'gross profit': 'gross_profit',
+}
+
+# Counts are downcast to int32. Money stays float64: float32 only has about seven
+# significant digits, so campaign-level totals would no longer be exact to the cent.
+MARKETING_DTYPES = {
+    'impressions': 'int32',
+    'clicks': 'int32',
+    'spend': 'float64',
+    'attributed_revenue': 'float64',
+}
+BUSINESS_DTYPES = {
+    'orders': 'int64',
+    'new_orders': 'int64',
+    'new_customers': 'int64',
+    'total_revenue': 'float64',
+    'gross_profit': 'float64',
+    'cogs': 'float64',
+}
+# Every frame stores dates at one resolution so they concatenate and compare cleanly.
+DATE_DTYPE = 'datetime64[ns]'
+
+# Grain of the marketing fact table: one row per campaign, state and tactic per day.
+MARKETING_KEYS = ['date', 'tactic', 'state', 'campaign']
+MARKETING_MEASURES = ['spend', 'impressions', 'clicks', 'attributed_revenue']
+BUSINESS_MEASURES = ['total_revenue', 'gross_profit', 'orders', 'new_customers']
+COUNT_MEASURES = {'impressions', 'clicks', 'orders', 'new_customers'}
+# Dimension columns are stored dictionary-encoded as pandas categoricals.
+DIMENSIONS = ['platform', 'tactic', 'state', 'campaign']
+
+
+def normalize_columns(df, renames):
+    """Applies the source-specific renames, then snake_cases every column name."""
+    df = df.rename(columns=renames)
+    df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
+    return df
+
+
+def concat_categorical(frames, columns):
+    """Concatenates frames whose categorical ``columns`` have different categories.
+
+    ``pd.concat`` falls back to object dtype unless the categories match, so the
+    categories are first widened to their union. The input frames are not modified.
+    """
+    frames = list(frames)
+    for col in columns:
+        categories = union_categoricals([df[col] for df in frames], ignore_order=True).categories.sort_values()
+        frames = [df.assign(**{col: df[col].cat.set_categories(categories)}) for df in frames]
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,67 @@
+# dashboard/simulation.py
+"""Monte Carlo revenue ranges for a budget allocation.
+
+Day-to-day revenue scatters around each channel's fitted response curve. The
+scatter is kept as one ratio (actual / fitted revenue) per historical day and
+channel. A scenario replays ``horizon_days`` historical days drawn with
+replacement. Every channel uses the same days, so channels that rise and fall
+together stay correlated. All scenarios are drawn as one index array, and no
+Python code runs per scenario.
+"""
+
+import numpy as np
+import pandas as pd
+
+from dashboard.response import channel_columns, channel_label
+
+SCENARIOS = 20_000
+PERCENTILES = (10, 50, 90)
+
+# Upper bound on the day indexes drawn at once (scenarios x days), which keeps
+# long horizons from allocating one huge index array.
+MAX_DRAWS = 2_000_000
+
+
+def daily_ratios(daily, curves, by):
+    """Actual over fitted revenue, one row per historical day and one column per ``curves.channels``.
+
+    ``curves`` are the channels at level ``by`` (see :func:`~dashboard.response.channel_columns`).
+    A channel with no spend on a day, or no fitted revenue, gets a ratio of 1.
+    """
+    pivot = daily.pivot_table(
+        index='date', columns=channel_columns(by), values=['spend', 'attributed_revenue'], aggfunc='sum', observed=True
+    )
+    channels = list(curves.channels)
+
+    def by_channel(measure):
+        frame = pivot[measure]
+        frame.columns = [channel_label(key) for key in frame.columns]
+        return frame.reindex(columns=channels).to_numpy(dtype=float)
+
+    spend, revenue = by_channel('spend'), by_channel('attributed_revenue')
+    fitted = curves.revenue(spend)
+    return np.divide(revenue, fitted, out=np.ones_like(fitted), where=fitted > 0)
+
+
+def simulate(curves, ratios, allocations, horizon_days, scenarios=SCENARIOS, seed=0):
+    """Total revenue of each of ``scenarios`` simulated runs of ``allocations`` over ``horizon_days``."""
+    # Spend is spread evenly, so one historical day's scatter always gives
+    # the same total. Resampling days means resampling these totals.
+    day_revenue = ratios @ curves.revenue(np.asarray(allocations, dtype=float) / horizon_days)
+    rng = np.random.default_rng(seed)
+    revenue = np.zeros(scenarios)
+    block = max(1, MAX_DRAWS // scenarios)
+    for first_day in range(0, horizon_days, block):
+        days = min(block, horizon_days - first_day)
+        revenue += day_revenue[rng.integers(0, len(day_revenue), (scenarios, days))].sum(axis=1)
+    return revenue
+
+
+def revenue_bands(curves, ratios, allocations, horizon_days, scenarios=SCENARIOS):
+    """Revenue and ROAS at each of ``PERCENTILES`` across the simulated scenarios."""
+    budget = float(np.sum(allocations))
+    revenue = np.percentile(simulate(curves, ratios, allocations, horizon_days, scenarios), PERCENTILES)
+    return pd.DataFrame(
+        {'revenue': revenue, 'roas': revenue / budget if budget > 0 else 0.0},
+        index=[f'P{p}' for p in PERCENTILES],
+    )
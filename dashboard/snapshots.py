@@ -0,0 +1,208 @@
+# dashboard/snapshots.py
+"""Append-only Parquet snapshots of the source CSVs, tracked by watermarks.
+
+Each source gets a directory of Parquet parts under ``config.CACHE_DIR`` and a
+manifest holding its watermark: how many bytes of the CSV have been ingested
+and the latest date seen. When the CSV has only grown since then, just the
+bytes past the watermark are parsed and written as one more part. Any other
+change (a rewrite, truncation or edit) rebuilds the snapshot from scratch.
+"""
+
+import hashlib
+import io
+import json
+import logging
+import shutil
+from dataclasses import asdict, dataclass
+
+import pandas as pd
+
+from dashboard import config
+from dashboard.schema import concat_categorical
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the snapshot layout changes so stale snapshots are rebuilt.
+SNAPSHOT_VERSION = 4
+
+# Bytes hashed at the start of the file and just before the watermark to
+# tell an append apart from a rewrite.
+DIGEST_BYTES = 64 * 1024
+
+# Parts are merged back into one once a snapshot has accumulated this many.
+MAX_PARTS = 64
+
+
+@dataclass
+class Watermark:
+    """How far into a source file its snapshot reaches."""
+    offset: int
+    max_date: str
+    mtime_ns: int
+    size: int
+    head_digest: str
+    tail_digest: str
+    parts: int
+    version: int = SNAPSHOT_VERSION
+    mode: str = config.INGEST_MODE
+
+
+@dataclass
+class SourceUpdate:
+    """Outcome of syncing one snapshot: ``'unchanged'``, ``'append'`` or ``'rebuild'``.
+
+    ``delta`` holds the newly ingested rows of an append, ``frame`` the whole
+    source after a rebuild.
+    """
+    kind: str
+    delta: pd.DataFrame = None
+    frame: pd.DataFrame = None
+
+
+def _digest(f, start, stop):
+    f.seek(start)
+    return hashlib.sha1(f.read(stop - start)).hexdigest()
+
+
+def _paths(name):
+    return config.CACHE_DIR / name, config.CACHE_DIR / f'{name}.json'
+
+
+def read_watermark(name):
+    _, manifest_path = _paths(name)
+    try:
+        return Watermark(**json.loads(manifest_path.read_text()))
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def _write_part(name, df, index):
+    part_dir, _ = _paths(name)
+    part_dir.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(part_dir / f'part-{index:05d}.parquet', index=False)
+
+
+def _write_watermark(name, path, df, offset, parts, previous=None):
+    stat = path.stat()
+    max_date = df['date'].max() if len(df) else None
+    if previous is not None and (max_date is None or pd.isna(max_date) or str(max_date) < previous.max_date):
+        max_date = previous.max_date
+    with open(path, 'rb') as f:
+        watermark = Watermark(
+            offset=offset,
+            max_date=str(max_date),
+            mtime_ns=stat.st_mtime_ns,
+            size=stat.st_size,
+            head_digest=_digest(f, 0, min(offset, DIGEST_BYTES)),
+            tail_digest=_digest(f, max(0, offset - DIGEST_BYTES), offset),
+            parts=parts,
+            mode=config.INGEST_MODE,
+        )
+    _paths(name)[1].write_text(json.dumps(asdict(watermark)))
+    return watermark
+
+
+def read(name):
+    """Reads every part of a snapshot back into one frame."""
+    part_dir, _ = _paths(name)
+    return pd.read_parquet(part_dir)
+
+
+def _is_append(path, watermark):
+    """True when ``path`` still starts with exactly the bytes behind ``watermark``."""
+    if watermark.version != SNAPSHOT_VERSION or watermark.mode != config.INGEST_MODE:
+        return False
+    if path.stat().st_size < watermark.offset:
+        return False
+    with open(path, 'rb') as f:
+        return (
+            _digest(f, 0, min(watermark.offset, DIGEST_BYTES)) == watermark.head_digest
+            and _digest(f, max(0, watermark.offset - DIGEST_BYTES), watermark.offset) == watermark.tail_digest
+        )
+
+
+def _read_tail(path, offset):
+    """Returns ``(csv_bytes, new_offset)``: the header plus every complete line past ``offset``."""
+    with open(path, 'rb') as f:
+        header = f.readline()
+        f.seek(offset)
+        tail = f.read()
+    # A line still being written has no newline yet; leave it for the next sync.
+    end = tail.rfind(b'\n') + 1
+    return header + tail[:end], offset + end
+
+
+def _complete_length(f):
+    """Bytes of ``f`` up to and including its last newline."""
+    end = f.seek(0, io.SEEK_END)
+    while end > 0:
+        start = max(0, end - DIGEST_BYTES)
+        f.seek(start)
+        newline = f.read(end - start).rfind(b'\n')
+        if newline >= 0:
+            return start + newline + 1
+        end = start
+    return 0
+
+
+class _Prefix(io.RawIOBase):
+    """The first ``size`` bytes of a binary file, read as a stream of their own."""
+
+    def __init__(self, f, size):
+        self._f = f
+        self._left = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self._f.readinto(memoryview(buffer)[:self._left])
+        self._left -= n
+        return n
+
+
+def _rebuild(name, path, parse):
+    part_dir, _ = _paths(name)
+    shutil.rmtree(part_dir, ignore_errors=True)
+    with open(path, 'rb') as f:
+        # As on an append, a line still being written is left for the next
+        # sync, and rows written while parsing are not ingested twice.
+        offset = _complete_length(f)
+        f.seek(0)
+        df = parse(io.BufferedReader(_Prefix(f, offset)))
+    _write_part(name, df, 0)
+    _write_watermark(name, path, df, offset, parts=1)
+    return df
+
+
+def sync(name, path, parse):
+    """Brings the snapshot of ``path`` up to date and reports what changed.
+
+    ``parse`` turns a CSV path or buffer into the source's frame; on an append
+    it is only given the header and the new lines.
+    """
+    watermark = read_watermark(name)
+    stat = path.stat()
+    if watermark is not None and (watermark.mtime_ns, watermark.size) == (stat.st_mtime_ns, stat.st_size) \
+            and watermark.version == SNAPSHOT_VERSION and watermark.mode == config.INGEST_MODE:
+        return SourceUpdate('unchanged')
+
+    if watermark is not None and stat.st_size > watermark.offset and _is_append(path, watermark):
+        data, offset = _read_tail(path, watermark.offset)
+        if offset == watermark.offset:
+            return SourceUpdate('unchanged')
+        delta = parse(io.BytesIO(data))
+        if watermark.parts >= MAX_PARTS:
+            df = read(name)
+            df = concat_categorical([df, delta], df.select_dtypes('category').columns)
+            shutil.rmtree(_paths(name)[0], ignore_errors=True)
+            _write_part(name, df, 0)
+            parts = 1
+        else:
+            _write_part(name, delta, watermark.parts)
+            parts = watermark.parts + 1
+        _write_watermark(name, path, delta, offset, parts, previous=watermark)
+        logger.info("Appended %d new rows to the %s snapshot", len(delta), name)
+        return SourceUpdate('append', delta)
+
+    return SourceUpdate('rebuild', frame=_rebuild(name, path, parse))
@@ -0,0 +1,54 @@
+# dashboard/sources.py
+"""Registry of the source files the dashboard loads.
+
+Each ad platform is one :class:`Source`: its display name, the CSV it is read
+from and how that export's column names map onto the shared schema. Adding a
+platform is one :func:`register` call; every loader and page picks it up.
+"""
+
+from dataclasses import dataclass, field
+
+from dashboard.schema import BUSINESS_RENAMES, MARKETING_RENAMES
+
+
+@dataclass(frozen=True)
+class Source:
+    """One CSV export and how to read it."""
+    name: str
+    path: str
+    columns: dict = field(default_factory=lambda: dict(MARKETING_RENAMES))
+    kind: str = 'marketing'
+
+    @property
+    def snapshot_name(self):
+        return self.name.lower()
+
+
+_REGISTRY = {}
+
+
+def register(source):
+    """Adds (or replaces) a source in the registry.
+
+    There is one business source, which the loaders expect last; see :func:`registered`.
+    """
+    if source.kind not in ('marketing', 'business'):
+        raise ValueError(f"Source kind must be 'marketing' or 'business', not {source.kind!r}")
+    if source.kind == 'business' and any(
+        other.kind == 'business' and other.name != source.name for other in _REGISTRY.values()
+    ):
+        raise ValueError(f"Only one business source can be registered, cannot add {source.name!r}")
+    _REGISTRY[source.name] = source
+    return source
+
+
+def registered():
+    """Every registered source, marketing platforms first and in registration order."""
+    return sorted(_REGISTRY.values(), key=lambda source: source.kind == 'business')
+
+
+# --- BUILT-IN SOURCES ---
+register(Source('Facebook', 'Facebook.csv'))
+register(Source('Google', 'Google.csv'))
+register(Source('TikTok', 'TikTok.csv'))
+register(Source('Business', 'business.csv', columns=dict(BUSINESS_RENAMES), kind='business'))
@@ -0,0 +1,238 @@
+# dashboard/sqlite_backend.py
+"""Page queries pushed down to an indexed SQLite file.
+
+The source CSVs are streamed chunk by chunk into ``config.SQLITE_PATH``, so the
+store never needs the whole dataset in memory. Every page query becomes one
+SQL statement with the date and platform predicates and the GROUP BY applied
+inside SQLite, and only the (small) result comes back as a frame. Several app
+processes can read the same file.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from dashboard import config, ingest
+from dashboard import sources as registry
+from dashboard.rollup import with_ratios
+from dashboard.schema import BUSINESS_MEASURES, COUNT_MEASURES, DATE_DTYPE, DIMENSIONS, MARKETING_MEASURES
+
+logger = logging.getLogger(__name__)
+
+MARKETING_COLUMNS = ['date', *DIMENSIONS, *MARKETING_MEASURES]
+
+_SCHEMA = """
+CREATE TABLE marketing (
+    date TEXT NOT NULL, platform TEXT NOT NULL, tactic TEXT, state TEXT, campaign TEXT,
+    spend REAL, impressions INTEGER, clicks INTEGER, attributed_revenue REAL
+);
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+_INDEXES = """
+CREATE INDEX marketing_platform_date ON marketing (platform, date);
+CREATE INDEX marketing_date ON marketing (date);
+CREATE TABLE daily AS
+    SELECT b.*,
+           COALESCE(m.spend, 0) AS spend, COALESCE(m.impressions, 0) AS impressions,
+           COALESCE(m.clicks, 0) AS clicks, COALESCE(m.attributed_revenue, 0) AS attributed_revenue
+    FROM business AS b
+    LEFT JOIN (
+        SELECT date, SUM(spend) AS spend, SUM(impressions) AS impressions,
+               SUM(clicks) AS clicks, SUM(attributed_revenue) AS attributed_revenue
+        FROM marketing GROUP BY date
+    ) AS m USING (date);
+CREATE INDEX daily_date ON daily (date);
+"""
+
+_SUMS = ', '.join(f'SUM({col}) AS {col}' for col in MARKETING_MEASURES)
+
+# Same definitions as build_daily_performance; a zero denominator gives 0.
+_DAILY_RATIOS = """
+    COALESCE(attributed_revenue * 1.0 / NULLIF(spend, 0), 0) AS roas,
+    COALESCE(spend * 1.0 / NULLIF(clicks, 0), 0) AS cpc,
+    COALESCE(clicks * 100.0 / NULLIF(impressions, 0), 0) AS ctr,
+    COALESCE(spend * 1.0 / NULLIF(orders, 0), 0) AS cpo,
+    COALESCE(spend * 1.0 / NULLIF(new_customers, 0), 0) AS cac
+"""
+
+
+def _day(date):
+    return pd.Timestamp(date).strftime('%Y-%m-%d')
+
+
+# Written to ``meta`` by build() so that the queries every page rerun makes
+# are key lookups rather than scans of the marketing table.
+META_KEYS = {'fingerprint', 'daily_rows', 'daily_first', 'daily_last', 'marketing_first', 'marketing_last', 'platforms'}
+
+
+def _summary(con):
+    # Separate MIN and MAX statements, so each is a single index lookup.
+    def one(sql):
+        return con.execute(sql).fetchone()[0]
+
+    return {
+        'daily_rows': json.dumps(one('SELECT COUNT(*) FROM daily')),
+        'daily_first': json.dumps(one('SELECT MIN(date) FROM daily')),
+        'daily_last': json.dumps(one('SELECT MAX(date) FROM daily')),
+        'marketing_first': json.dumps(one('SELECT MIN(date) FROM marketing')),
+        'marketing_last': json.dumps(one('SELECT MAX(date) FROM marketing')),
+        'platforms': json.dumps([row[0] for row in con.execute('SELECT DISTINCT platform FROM marketing ORDER BY platform')]),
+    }
+
+
+def build(path, fingerprint):
+    """Streams every registered source into a fresh SQLite file at ``path``.
+
+    The file is written under a temporary name and moved into place, so readers
+    never see a half-built store.
+    """
+    tmp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path.unlink(missing_ok=True)
+    con = sqlite3.connect(tmp_path)
+    try:
+        con.executescript(_SCHEMA)
+        for source in registry.registered():
+            for chunk in ingest.read_chunks(config.DATA_DIR / source.path, source.columns, config.CHUNK_SIZE):
+                chunk['date'] = chunk['date'].dt.strftime('%Y-%m-%d')
+                if source.kind == 'marketing':
+                    chunk['platform'] = source.name
+                    chunk[MARKETING_COLUMNS].to_sql('marketing', con, if_exists='append', index=False)
+                else:
+                    chunk.to_sql('business', con, if_exists='append', index=False)
+        con.executescript(_INDEXES)
+        con.executemany('INSERT INTO meta VALUES (?, ?)', [('fingerprint', repr(fingerprint)), *_summary(con).items()])
+        con.commit()
+    finally:
+        con.close()
+    os.replace(tmp_path, path)
+    logger.info("Built SQLite store at %s", path)
+
+
+class SQLiteBackend:
+    """Serves page queries from the SQLite store, building it when the sources change."""
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self._meta = self._read_meta()
+        if self._meta.get('fingerprint') != repr(fingerprint) or not META_KEYS <= set(self._meta):
+            build(path, fingerprint)
+            self._meta = self._read_meta()
+
+    def _connect(self):
+        # One short-lived read-only connection per query keeps the backend
+        # safe to share between Streamlit's session threads.
+        return sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+
+    def _read_meta(self):
+        if not self.path.exists():
+            return {}
+        try:
+            with closing(self._connect()) as con:
+                rows = con.execute('SELECT key, value FROM meta').fetchall()
+        except sqlite3.Error:
+            return {}
+        return {key: value if key == 'fingerprint' else json.loads(value) for key, value in rows}
+
+    def _query(self, sql, params=()):
+        con = self._connect()
+        try:
+            df = pd.read_sql_query(sql, con, params=params)
+        finally:
+            con.close()
+        if 'date' in df.columns:
+            df['date'] = pd.to_datetime(df['date']).astype(DATE_DTYPE)
+        return df
+
+    @staticmethod
+    def _where(start, end, platform=None):
+        sql, params = 'date BETWEEN ? AND ?', [_day(start), _day(end)]
+        if platform is not None:
+            sql, params = f'{sql} AND platform = ?', [*params, platform]
+        return sql, params
+
+    @property
+    def empty(self):
+        return self._meta['daily_rows'] == 0
+
+    def _date_range(self, table):
+        return pd.Timestamp(self._meta[f'{table}_first']), pd.Timestamp(self._meta[f'{table}_last'])
+
+    def daily_date_range(self):
+        return self._date_range('daily')
+
+    def marketing_date_range(self):
+        return self._date_range('marketing')
+
+    def platforms(self):
+        return list(self._meta['platforms'])
+
+    def daily(self, start, end):
+        where, params = self._where(start, end)
+        return self._query(f'SELECT *, {_DAILY_RATIOS} FROM daily WHERE {where} ORDER BY date', params)
+
+    def marketing_rows(self, start, end, platform=None):
+        where, params = self._where(start, end, platform)
+        return self._query(
+            f'SELECT *, COALESCE(attributed_revenue * 1.0 / NULLIF(spend, 0), 0) AS roas '
+            f'FROM marketing WHERE {where} ORDER BY platform, date',
+            params,
+        )
+
+    def kpis(self, start, end, platform=None):
+        if platform is None:
+            where, params = self._where(start, end)
+            measures = [*MARKETING_MEASURES, *BUSINESS_MEASURES]
+            sql = f"SELECT {', '.join(f'SUM({col}) AS {col}' for col in measures)} FROM daily WHERE {where}"
+        else:
+            where, params = self._where(start, end, platform)
+            sql = f'SELECT {_SUMS} FROM marketing WHERE {where}'
+        sums = self._query(sql, params).iloc[0].fillna(0).astype(object)
+        for col in COUNT_MEASURES & set(sums.index):
+            sums[col] = int(sums[col])
+        return with_ratios(sums)
+
+    @staticmethod
+    def _group_columns(by):
+        by = [by] if isinstance(by, str) else list(by)
+        unknown = set(by) - set(DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Cannot break down by {sorted(unknown)}")
+        return ', '.join(by)
+
+    def breakdown(self, start, end, by, platform=None):
+        columns = self._group_columns(by)
+        where, params = self._where(start, end, platform)
+        return self._query(
+            f'SELECT {columns}, {_SUMS} FROM marketing WHERE {where} GROUP BY {columns} ORDER BY {columns}', params,
+        )
+
+    def daily_breakdown(self, start, end, by):
+        columns = self._group_columns(by)
+        where, params = self._where(start, end)
+        return self._query(
+            f'SELECT date, {columns}, {_SUMS} '
+            f'FROM marketing WHERE {where} GROUP BY date, {columns} ORDER BY date, {columns}',
+            params,
+        )
+
+    def daily_trend(self, start, end, platform):
+        where, params = self._where(start, end, platform)
+        return self._query(
+            f'SELECT date, SUM(spend) AS spend, SUM(attributed_revenue) AS attributed_revenue '
+            f'FROM marketing WHERE {where} GROUP BY date ORDER BY date',
+            params,
+        )
+
+    def state_map(self, start, end, platform):
+        where, params = self._where(start, end, platform)
+        return self._query(
+            f'SELECT state, SUM(spend) AS spend, AVG(COALESCE(attributed_revenue * 1.0 / NULLIF(spend, 0), 0)) AS roas '
+            f'FROM marketing WHERE {where} GROUP BY state ORDER BY state',
+            params,
+        )
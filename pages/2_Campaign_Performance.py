@@ -3,80 +3,70 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+from functools import partial
 
-st.set_page_config(page_title="Campaign Performance", layout="wide")
+from dashboard import export, perf
+from dashboard.cache import export_file, load_backend
+from dashboard.export import FORMATS as EXPORT_FORMATS
+from dashboard.leaderboard import FORMATS, METRICS, Leaderboard
+from dashboard.reports import campaign_table
 
-# (Copy the same load_and_prepare_data function from your other pages here)
-@st.cache_data
-def load_and_prepare_data():
-    try:
-        df_facebook = pd.read_csv('Facebook.csv').rename(columns={'impression': 'impressions', 'attributed revenue': 'attributed_revenue'})
-        df_google = pd.read_csv('Google.csv').rename(columns={'impression': 'impressions', 'attributed revenue': 'attributed_revenue'})
-        df_tiktok = pd.read_csv('TikTok.csv').rename(columns={'impression': 'impressions', 'attributed revenue': 'attributed_revenue'})
-        for df in [df_facebook, df_google, df_tiktok]:
-            df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
-        df_facebook['platform'] = 'Facebook'; df_google['platform'] = 'Google'; df_tiktok['platform'] = 'TikTok'
-        df_marketing = pd.concat([df_facebook, df_google, df_tiktok], ignore_index=True)
-        return df_marketing
-    except Exception:
-        return pd.DataFrame()
+st.set_page_config(page_title="Campaign Performance", layout="wide")
 
-df_marketing_details = load_and_prepare_data()
+perf.start('Campaign Performance')
+with perf.section('load'):
+    backend = load_backend()
 
 st.title("🎯 Campaign Performance")
 st.markdown("Drill down into the performance of individual marketing campaigns.")
 
-if not df_marketing_details.empty:
-    df_marketing_details['date'] = pd.to_datetime(df_marketing_details['date'])
-
+if not backend.empty:
     # --- FILTERS ---
     st.sidebar.header("Filters")
-    min_date = df_marketing_details['date'].min().date()
-    max_date = df_marketing_details['date'].max().date()
+    min_date, max_date = (d.date() for d in backend.marketing_date_range())
     date_range = st.sidebar.date_input("Select Date Range", value=(min_date, max_date))
 
     # Platform selector to narrow down campaigns
-    platform_list = ["All"] + df_marketing_details['platform'].unique().tolist()
+    platform_list = ["All"] + backend.platforms()
     selected_platform = st.sidebar.selectbox("Select a Platform", platform_list)
 
     if len(date_range) == 2:
         start_date, end_date = pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1])
 
-        # Filter by date first
-        mask = (df_marketing_details['date'] >= start_date) & (df_marketing_details['date'] <= end_date)
-        df_filtered = df_marketing_details[mask]
-
-        # Optional filter by platform
-        if selected_platform != "All":
-            df_filtered = df_filtered[df_filtered['platform'] == selected_platform]
-
         st.header(f"Campaign Breakdown for {selected_platform} Platform(s)")
 
         # --- Campaign Performance Table ---
-        campaign_performance = df_filtered.groupby(['platform', 'campaign']).agg(
-            spend=('spend', 'sum'),
-            attributed_revenue=('attributed_revenue', 'sum'),
-            clicks=('clicks', 'sum'),
-            impressions=('impressions', 'sum')
-        ).reset_index()
-
-        campaign_performance['roas'] = (campaign_performance['attributed_revenue'] / campaign_performance['spend']).fillna(0)
-        campaign_performance['cpc'] = (campaign_performance['spend'] / campaign_performance['clicks']).fillna(0)
-        campaign_performance['ctr'] = (campaign_performance['clicks'] / campaign_performance['impressions'] * 100).fillna(0)
-
-        st.dataframe(
-            campaign_performance.sort_values('roas', ascending=False).style.format({
-                'spend': '${:,.2f}',
-                'attributed_revenue': '${:,.2f}',
-                'roas': '{:.2f}x',
-                'cpc': '${:,.2f}',
-                'ctr': '{:.2f}%'
-            })
+        with perf.section('aggregate'):
+            campaign_performance = campaign_table(
+                backend, start_date, end_date, platform=None if selected_platform == "All" else selected_platform,
+            )
+
+        # Only the visible page is selected and formatted, never the full ranking
+        c1, c2, c3 = st.columns(3)
+        rank_by = c1.selectbox("Rank By", list(METRICS), format_func=METRICS.get)
+        order = c2.radio("Show", ["Top", "Bottom"], horizontal=True)
+        page_size = c3.selectbox("Campaigns per Page", [25, 50, 100])
+
+        with perf.section('aggregate'):
+            leaderboard = Leaderboard(campaign_performance, rank_by, ascending=order == "Bottom")
+            n_pages = leaderboard.n_pages(page_size)
+            page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1) if n_pages > 1 else 1
+            df_page = leaderboard.page(page - 1, page_size)
+
+        with perf.section('table'):
+            st.dataframe(df_page.style.format(FORMATS), hide_index=True)
+        first = (page - 1) * page_size
+        st.caption(f"Showing campaigns {first + 1:,}–{first + len(df_page):,} of {len(leaderboard):,}.")
+
+        export_format = st.selectbox("Export Format", list(EXPORT_FORMATS), format_func=lambda fmt: EXPORT_FORMATS[fmt][0])
+        st.download_button(
+            label=f"📥 Download Campaign Data as {EXPORT_FORMATS[export_format][0]}",
+            data=partial(export_file, campaign_performance, ('campaigns', start_date, end_date, selected_platform), export_format),
+            file_name=export.file_name('campaign_data', export_format),
+            mime=export.mime_type(export_format),
         )
 
-        st.download_button(
-            label="📥 Download Campaign Data as CSV",
-            data=campaign_performance.to_csv(index=False).encode('utf-8'),
-            file_name='campaign_data.csv',
-            mime='text/csv',
-        )
\ No newline at end of file
+# --- PERFORMANCE PANEL ---
+perf_record = perf.finish()
+if perf_record:
+    perf.show_panel(perf_record)
@@ -2,41 +2,34 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 
+from dashboard import perf
+from dashboard.cache import load_backend, response_curves, revenue_bands
+from dashboard.response import CURVE_SPEND_MULTIPLE, channel_columns, optimize
+
 st.set_page_config(page_title="Budget Planner", layout="wide")
 
-# (Copy the same load_and_prepare_data function from your other pages here)
-@st.cache_data
-def load_and_prepare_data():
-    try:
-        # Load and combine all marketing data
-        df_facebook = pd.read_csv('Facebook.csv').rename(columns={'impression': 'impressions', 'attributed revenue': 'attributed_revenue'})
-        df_google = pd.read_csv('Google.csv').rename(columns={'impression': 'impressions', 'attributed revenue': 'attributed_revenue'})
-        df_tiktok = pd.read_csv('TikTok.csv').rename(columns={'impression': 'impressions', 'attributed revenue': 'attributed_revenue'})
-        for df in [df_facebook, df_google, df_tiktok]:
-            df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_')
-        df_facebook['platform'] = 'Facebook'; df_google['platform'] = 'Google'; df_tiktok['platform'] = 'TikTok'
-        df_marketing = pd.concat([df_facebook, df_google, df_tiktok], ignore_index=True)
-        return df_marketing
-    except Exception:
-        return pd.DataFrame()
-
-df_marketing_details = load_and_prepare_data()
+perf.start('Budget Planner')
+with perf.section('load'):
+    backend = load_backend()
 
 st.title("💰 Budget Scenario Planner")
-st.markdown("Use historical performance to project outcomes with a hypothetical budget.")
+st.markdown("Use historical performance to project outcomes with a hypothetical budget. Projections follow each channel's fitted diminishing-returns curve.")
 
-if not df_marketing_details.empty:
+if not backend.empty:
     # --- CALCULATE HISTORICAL ROAS ---
-    platform_avg_roas = df_marketing_details.groupby('platform').agg(
-        total_spend=('spend', 'sum'),
-        total_revenue=('attributed_revenue', 'sum')
-    ).reset_index()
-    platform_avg_roas['avg_roas'] = (platform_avg_roas['total_revenue'] / platform_avg_roas['total_spend']).fillna(0)
+    with perf.section('aggregate'):
+        first_date, last_date = backend.marketing_date_range()
+        platform_avg_roas = backend.breakdown(first_date, last_date, 'platform').rename(
+            columns={'spend': 'total_spend', 'attributed_revenue': 'total_revenue'}
+        )
+        platform_avg_roas['avg_roas'] = (platform_avg_roas['total_revenue'] / platform_avg_roas['total_spend']).fillna(0)
 
     st.sidebar.header("Budget Allocation")
     total_budget = st.sidebar.number_input("Enter Total Budget to Allocate", min_value=1000, value=50000, step=1000)
+    horizon_days = st.sidebar.number_input("Days to Spend the Budget Over", min_value=1, max_value=365, value=30, step=1)
 
     platforms = platform_avg_roas['platform'].unique()
     budget_allocations = {}
@@ -61,13 +54,15 @@ if not df_marketing_details.empty:
     # --- PROJECTED RESULTS ---
     st.header("Projected Performance")
     
-    projection_data = []
-    for platform, spend in budget_allocations.items():
-        avg_roas = platform_avg_roas[platform_avg_roas['platform'] == platform]['avg_roas'].iloc[0]
-        projected_revenue = spend * avg_roas
-        projection_data.append({'Platform': platform, 'Projected Spend': spend, 'Projected Revenue': projected_revenue})
-    
-    df_projection = pd.DataFrame(projection_data)
+    # The curves are fitted once per data version and shared by every rerun
+    with perf.section('model'):
+        curves = response_curves('platform')
+        spend = np.array([budget_allocations.get(platform, 0) for platform in curves.channels], dtype=float)
+        df_projection = pd.DataFrame({
+            'Platform': list(curves.channels),
+            'Projected Spend': spend,
+            'Projected Revenue': curves.revenue(spend, horizon_days),
+        })
 
     total_projected_revenue = df_projection['Projected Revenue'].sum()
     total_projected_roas = (total_projected_revenue / allocated_budget) if allocated_budget > 0 else 0
@@ -76,11 +71,98 @@ if not df_marketing_details.empty:
     col1.metric("Total Projected Revenue", f"${total_projected_revenue:,.0f}")
     col2.metric("Projected ROAS", f"{total_projected_roas:.2f}x")
 
-    fig = px.bar(
-        df_projection,
-        x='Platform',
-        y='Projected Revenue',
-        color='Platform',
-        title="Projected Revenue by Platform"
+    # --- PROJECTION RANGE ---
+    # Bootstrapped from historical day-to-day variation around the curves
+    if allocated_budget > 0:
+        with perf.section('simulate'):
+            bands = revenue_bands(spend, horizon_days)
+        st.markdown(
+            f"In 80% of simulated scenarios revenue lands between **${bands.loc['P10', 'revenue']:,.0f}** "
+            f"and **${bands.loc['P90', 'revenue']:,.0f}** (median **${bands.loc['P50', 'revenue']:,.0f}**)."
+        )
+        with perf.section('table'):
+            st.dataframe(
+                bands.rename(columns={'revenue': 'Revenue', 'roas': 'ROAS'}).style.format({
+                    'Revenue': '${:,.0f}',
+                    'ROAS': '{:.2f}x'
+                })
+            )
+
+    with perf.section('chart'):
+        fig = px.bar(
+            df_projection,
+            x='Platform',
+            y='Projected Revenue',
+            color='Platform',
+            title="Projected Revenue by Platform"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    # --- RECOMMENDED ALLOCATION ---
+    st.header("Recommended Allocation")
+    level = st.selectbox("Optimize Across", ['platform', 'tactic', 'campaign'], format_func=str.title)
+
+    with perf.section('optimize'):
+        level_curves = response_curves(level)
+        recommended = optimize(level_curves, total_budget, horizon_days)
+        # Tactics and campaigns are optimized per platform, e.g. "TikTok / Prospecting"
+        df_recommended = pd.DataFrame({
+            ' / '.join(col.title() for col in channel_columns(level)): list(level_curves.channels),
+            'Recommended Spend': recommended,
+            'Projected Revenue': level_curves.revenue(recommended, horizon_days),
+            'Marginal ROAS': level_curves.marginal_roas(recommended, horizon_days),
+        }).sort_values('Recommended Spend', ascending=False)
+
+    recommended_revenue = df_recommended['Projected Revenue'].sum()
+    col1, col2 = st.columns(2)
+    col1.metric(
+        "Projected Revenue (Recommended)",
+        f"${recommended_revenue:,.0f}",
+        f"{recommended_revenue - total_projected_revenue:,.0f} vs. your allocation",
     )
-    st.plotly_chart(fig, use_container_width=True)
\ No newline at end of file
+    col2.metric("Projected ROAS (Recommended)", f"{recommended_revenue / total_budget:.2f}x")
+
+    with perf.section('table'):
+        st.dataframe(
+            df_recommended.style.format({
+                'Recommended Spend': '${:,.0f}',
+                'Projected Revenue': '${:,.0f}',
+                'Marginal ROAS': '{:.2f}x'
+            }),
+            hide_index=True
+        )
+
+    # --- RESPONSE CURVES ---
+    with st.expander("📈 Fitted Response Curves"):
+        with perf.section('chart'):
+            # Each curve stops at a small multiple of the most the channel has spent in a day
+            daily_spend = np.linspace(0, CURVE_SPEND_MULTIPLE, 100)[:, None] * curves.max_spend
+            df_curves = pd.DataFrame({
+                'Platform': np.tile(curves.channels, len(daily_spend)),
+                'Daily Spend': daily_spend.ravel(),
+                'Daily Revenue': curves.revenue(daily_spend).ravel(),
+            })
+            fig_curves = px.line(
+                df_curves, x='Daily Spend', y='Daily Revenue', color='Platform',
+                title="Expected Daily Revenue by Daily Spend"
+            )
+            st.plotly_chart(fig_curves, use_container_width=True)
+        unsaturated = [channel for channel, edge in zip(curves.channels, curves.at_grid_edge) if edge]
+        if unsaturated:
+            st.warning(
+                f"No diminishing returns are visible yet for {', '.join(unsaturated)}: their curves are close to "
+                "linear, so projections well above their historical daily spend are optimistic."
+            )
+        with perf.section('table'):
+            st.dataframe(
+                curves.table().rename(columns={
+                    'channel': 'Platform', 'r2': 'R²', 'days': 'Days Fitted',
+                    'max_spend': 'Max Daily Spend', 'at_grid_edge': 'No Saturation Seen',
+                }),
+                hide_index=True
+            )
+
+# --- PERFORMANCE PANEL ---
+perf_record = perf.finish()
+if perf_record:
+    perf.show_panel(perf_record)
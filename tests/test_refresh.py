@@ -0,0 +1,101 @@
+# tests/test_refresh.py
+
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from dashboard import config, data, rollup
+from dashboard.backend import PandasBackend
+
+REPO = Path(__file__).resolve().parent.parent
+SOURCES = ['Facebook.csv', 'Google.csv', 'TikTok.csv', 'business.csv']
+
+LEVELS = ['platform', 'tactic', 'state', 'campaign', ['platform', 'state'], ['platform', 'campaign']]
+
+NEW_ROWS = {
+    # The last bundled day again, a new day, a new campaign and a new state.
+    'Facebook.csv': [
+        '2025-09-12,ASC,TX,Facebook - ASC - C01,1000,20,150.00,420.50',
+        '2025-09-13,ASC,TX,Facebook - ASC - C01,1200,25,160.00,400.00',
+        '2025-09-13,Prospecting,ZZ,Facebook - Prospecting - C99,900,9,80.25,95.75',
+    ],
+    'Google.csv': [
+        '2025-09-13,Display,CA,Google - Display - C07,5000,40,300.00,610.00',
+    ],
+    'business.csv': [
+        '2025-09-13,2500,1000,950,250000.00,130000.00,120000.00',
+    ],
+}
+
+
+@pytest.fixture(params=['full', 'stream'])
+def data_dir(tmp_path, monkeypatch, request):
+    for name in SOURCES:
+        shutil.copy(REPO / name, tmp_path / name)
+    monkeypatch.setattr(config, 'DATA_DIR', tmp_path)
+    monkeypatch.setattr(config, 'CACHE_DIR', tmp_path / 'cache')
+    monkeypatch.setattr(config, 'INGEST_MODE', request.param)
+    return tmp_path
+
+
+def append_rows(data_dir, rows):
+    for name, lines in rows.items():
+        with open(data_dir / name, 'a') as f:
+            f.write(''.join(line + '\n' for line in lines))
+
+
+def refresh_without_rebuild(dataset, monkeypatch):
+    with monkeypatch.context() as m:
+        m.setattr(data, 'build_dataset', None)
+        return data.refresh_dataset(dataset)
+
+
+def assert_same_answers(dataset, expected):
+    appended, reloaded = PandasBackend(dataset), PandasBackend(expected)
+    first, last = reloaded.marketing_date_range()
+    assert appended.marketing_date_range() == (first, last)
+    for start, end in [(first, last), (last - pd.Timedelta(days=6), last), (last, last)]:
+        pd.testing.assert_series_equal(appended.kpis(start, end), reloaded.kpis(start, end))
+        for by in LEVELS:
+            for platform in [None, 'Facebook']:
+                pd.testing.assert_frame_equal(
+                    appended.breakdown(start, end, by, platform=platform),
+                    reloaded.breakdown(start, end, by, platform=platform),
+                )
+        # These read the sorted marketing rows rather than the rollup.
+        pd.testing.assert_frame_equal(
+            appended.daily_breakdown(start, end, ['platform', 'campaign', 'state']),
+            reloaded.daily_breakdown(start, end, ['platform', 'campaign', 'state']),
+        )
+        for platform in reloaded.platforms():
+            pd.testing.assert_frame_equal(appended.daily_trend(start, end, platform), reloaded.daily_trend(start, end, platform))
+            pd.testing.assert_frame_equal(appended.state_map(start, end, platform), reloaded.state_map(start, end, platform))
+
+
+@pytest.mark.parametrize('max_prefix_bytes', [rollup.MAX_PREFIX_BYTES, 0])
+def test_appended_rows_give_the_same_answers_as_a_reload(data_dir, monkeypatch, max_prefix_bytes):
+    monkeypatch.setattr(rollup, 'MAX_PREFIX_BYTES', max_prefix_bytes)
+    dataset = data.refresh_dataset()
+    before = data.load_dataset()
+    backend = PandasBackend(dataset)
+    first, last = backend.marketing_date_range()
+    # Build the prefix sums the refresh has to extend.
+    for by in LEVELS:
+        backend.breakdown(first, last, by)
+
+    append_rows(data_dir, NEW_ROWS)
+    refreshed = refresh_without_rebuild(dataset, monkeypatch)
+    assert len(refreshed.marketing) > len(dataset.marketing)
+    assert_same_answers(refreshed, data.load_dataset())
+    # Sessions still holding the earlier dataset see it unchanged.
+    assert_same_answers(dataset, before)
+
+
+def test_only_business_rows_appended(data_dir, monkeypatch):
+    dataset = data.refresh_dataset()
+    append_rows(data_dir, {'business.csv': NEW_ROWS['business.csv']})
+    refreshed = refresh_without_rebuild(dataset, monkeypatch)
+    assert len(refreshed.marketing) == len(dataset.marketing)
+    assert_same_answers(refreshed, data.load_dataset())
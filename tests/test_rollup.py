@@ -0,0 +1,41 @@
+# tests/test_rollup.py
+
+import pandas as pd
+import pytest
+
+from dashboard import config, rollup
+from dashboard.data import load_dataset
+
+LEVELS = ['platform', 'tactic', 'campaign', ['platform', 'state'], ['platform', 'campaign']]
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'CACHE_DIR', tmp_path / 'cache')
+    return load_dataset()
+
+
+def answers(cube, first, last):
+    ranges = [(first, last), (last - pd.Timedelta(days=6), last), (last, last), (first, first)]
+    return [
+        cube.breakdown(start, end, by, platform=platform)
+        for start, end in ranges for by in LEVELS for platform in [None, 'Google']
+    ] + [cube.totals(start, end, 'TikTok') for start, end in ranges]
+
+
+def assert_same(left, right):
+    for a, b in zip(left, right):
+        if isinstance(a, pd.Series):
+            pd.testing.assert_series_equal(a, b)
+        else:
+            pd.testing.assert_frame_equal(a, b)
+
+
+def test_levels_over_the_size_limit_are_summed_from_rows(dataset, monkeypatch):
+    first, last = dataset.marketing['date'].min(), dataset.marketing['date'].max()
+    dense = answers(dataset.rollup, first, last)
+
+    monkeypatch.setattr(rollup, 'MAX_PREFIX_BYTES', 0)
+    cube = rollup.RollupCube(dataset.marketing, dataset.daily)
+    assert_same(answers(cube, first, last), dense)
+    assert cube._prefix(('platform', 'campaign')) is None
@@ -0,0 +1,36 @@
+# tests/test_snapshots.py
+
+from functools import partial
+
+import pytest
+
+from dashboard import config, snapshots
+from dashboard.data import read_marketing_csv
+from dashboard.sources import Source
+
+HEADER = 'date,tactic,state,campaign,impression,clicks,spend,attributed revenue\n'
+ROW = '2025-05-16,ASC,NY,Facebook - ASC - C01,1000,10,100.5,300.25\n'
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'CACHE_DIR', tmp_path / 'cache')
+    return tmp_path
+
+
+def test_rebuild_leaves_a_half_written_last_line_for_the_next_sync(cache_dir):
+    path = cache_dir / 'Facebook.csv'
+    parse = partial(read_marketing_csv, source=Source('Facebook', 'Facebook.csv'))
+    path.write_text(HEADER + ROW + ROW[:-6])
+
+    update = snapshots.sync('facebook', path, parse)
+    assert update.kind == 'rebuild'
+    assert len(update.frame) == 1
+    assert snapshots.read_watermark('facebook').offset == len(HEADER + ROW)
+
+    with open(path, 'a') as f:
+        f.write(ROW[-6:])
+    update = snapshots.sync('facebook', path, parse)
+    assert update.kind == 'append'
+    assert update.delta['attributed_revenue'].tolist() == [300.25]
+    assert snapshots.read('facebook')['attributed_revenue'].tolist() == [300.25, 300.25]